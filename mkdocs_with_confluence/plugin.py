@@ -3,25 +3,24 @@
 # PYLINT_COMMENT: Why: Provides a high-level overview of the module's purpose.
 import time
 import os
+import collections
 import hashlib
-import sys
+import html
+import json
+import random
+import logging
 import re
-import tempfile
-import shutil
+import threading
+import uuid
 # PYLINT_COMMENT: plugin.py:9:0: C0411: standard import "mimetypes" should be placed before third party import "requests" (wrong-import-order)
 # PYLINT_COMMENT: How to fix: Group standard library imports first, then third-party, then local application imports. Move mimetypes before requests.
 # PYLINT_COMMENT: Why: Standard practice for readability and consistency (PEP 8).
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import mimetypes
-# PYLINT_COMMENT: plugin.py:11:0: C0411: standard import "contextlib" should be placed before third party imports "requests", "mistune" (wrong-import-order)
-# PYLINT_COMMENT: How to fix: Move contextlib before requests and mistune.
-# PYLINT_COMMENT: Why: PEP 8 import grouping.
 import mistune
-import contextlib
-# PYLINT_COMMENT: plugin.py:12:0: C0411: standard import "time.sleep" should be placed before third party imports "requests", "mistune" (wrong-import-order)
-# PYLINT_COMMENT: How to fix: `from time import sleep` is a standard library import. It should be grouped with other standard imports like `time`, `os`, etc., or if kept separate, still before third-party.
-# PYLINT_COMMENT: Why: PEP 8 import grouping.
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
 from mkdocs.config import config_options
 from mkdocs.plugins import BasePlugin
 from md2cf.confluence_renderer import ConfluenceRenderer
@@ -34,35 +33,270 @@ from os import environ
 # PYLINT_COMMENT: Why: PEP 8 import grouping.
 from pathlib import Path
 
-TEMPLATE_BODY = "<p> TEMPLATE </p>"
-
-
-@contextlib.contextmanager
-# PYLINT_COMMENT: plugin.py:23:0: C0116: Missing function or method docstring (missing-function-docstring)
-# PYLINT_COMMENT: How to fix: Add a docstring, e.g., """Temporarily suppresses stdout by redirecting it to a dummy file."""
-# PYLINT_COMMENT: Why: Explains the function's purpose, arguments, and behavior.
-def nostdout():
-    save_stdout = sys.stdout
-    sys.stdout = DummyFile()
-    yield
-    sys.stdout = save_stdout
-
-
-# PYLINT_COMMENT: plugin.py:30:0: C0115: Missing class docstring (missing-class-docstring)
-# PYLINT_COMMENT: How to fix: Add a docstring, e.g., """A dummy file-like object that discards all writes."""
-# PYLINT_COMMENT: Why: Explains the class's purpose.
-# PYLINT_COMMENT: plugin.py:30:0: R0205: Class 'DummyFile' inherits from object, can be safely removed from bases in python3 (useless-object-inheritance)
-# PYLINT_COMMENT: How to fix: Change `class DummyFile(object):` to `class DummyFile:`.
-# PYLINT_COMMENT: Why: In Python 3, inheriting from `object` is implicit and therefore redundant.
-# PYLINT_COMMENT: plugin.py:30:0: R0903: Too few public methods (1/2) (too-few-public-methods)
-# PYLINT_COMMENT: How to fix: This class is simple and likely fine. If Pylint is too strict, this can be disabled with `# pylint: disable=too-few-public-methods`. Otherwise, consider if the class truly needs to exist or if its functionality can be merged.
-# PYLINT_COMMENT: Why: Pylint flags classes with very few methods as they might not justify their existence as a class. However, for simple helper objects like this, it's often acceptable.
-class DummyFile(object):
-    # PYLINT_COMMENT: plugin.py:31:4: C0116: Missing function or method docstring (missing-function-docstring)
-    # PYLINT_COMMENT: How to fix: Add a docstring, e.g., """Silently discards any data written."""
-    # PYLINT_COMMENT: Why: Explains the method's behavior.
-    def write(self, x):
-        pass
+try:
+    import orjson
+except ImportError:  # Optional, only speeds up serialising large page bodies.
+    orjson = None
+
+log = logging.getLogger("mkdocs.plugins." + __name__)
+
+# Body of the placeholder pages created for nav sections; the title is inserted XML-escaped.
+TEMPLATE_BODY = "<p> {title} </p>"
+
+# Image references picked up as attachments, matched in a single pass: HTML <img> tags pointing at local files
+# ("file" group) and relative markdown images ("md" group).
+IMAGE_RE = re.compile(
+    r'<img src="file://(?P<file>[^"]+)"[^>]*>' r"|!\[[\w\. -]*\]\((?!http|file)(?P<md>[^\s,)]*)[^)]*\)"
+)
+# Locally rendered images under this directory are embedded as Confluence <ac:image> attachment macros.
+RENDERED_IMAGE_DIR = "/tmp/"
+
+# Default number of pages synced with Confluence in parallel (the `threads` option).
+SYNC_WORKERS = 10
+# Number of attachments uploaded in parallel, shared by all pages being synced.
+ATTACHMENT_WORKERS = 8
+
+# Read size when hashing attachments on Pythons without hashlib.file_digest.
+HASH_CHUNK_SIZE = 1 << 20
+
+# Number of titles looked up by one CQL search.
+PAGE_LOOKUP_BATCH = 25
+
+# Seconds a looked up page version is trusted; pages may also be edited on Confluence during the build.
+PAGE_VERSION_TTL = 30
+
+# Page size used when listing the attachments of a page.
+ATTACHMENT_LIST_LIMIT = 200
+
+# Width of the simple-log progress bar, in characters.
+PROGRESS_BAR_WIDTH = 50
+
+# Upper bound of a single backoff between two retries, in seconds.
+RETRY_BACKOFF_MAX = 16
+# Responses telling that Confluence is throttling us and did not process the request. They are retried by
+# ConfluenceSession rather than by the transport, so every attempt goes through the RateLimiter and slows
+# down all workers, not only the one that was throttled. Safe to retry for every method, POSTs included.
+THROTTLE_STATUSES = frozenset([429, 503])
+# Number of times a throttled request is sent again before its last response is returned.
+THROTTLE_RETRIES = 7
+
+
+class JitteredRetry(Retry):
+    """Retry with "full jitter": each backoff is drawn uniformly below the capped exponential delay.
+
+    Workers that hit the same overloaded server at the same time don't all retry in lock step.
+    A Retry-After header still takes precedence over the backoff.
+    """
+
+    def get_backoff_time(self):
+        backoff = min(super().get_backoff_time(), RETRY_BACKOFF_MAX)
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+# Transient Confluence errors are retried by the transport with exponential backoff;
+# the last response is returned as is, so callers still see an HTTPError from raise_for_status().
+# Client errors (400, 401, 403, 404...) are permanent and not retried. Only the idempotent GET and PUT are
+# retried after a read error or a 5xx: a POST (page and attachment creates) that reached Confluence but came
+# back as a 502/504 from a proxy must not be sent again. THROTTLE_STATUSES are left to ConfluenceSession.
+RETRY_POLICY = JitteredRetry(
+    total=7,
+    backoff_factor=0.5,
+    status_forcelist=[500, 502, 504],
+    allowed_methods=frozenset(["GET", "PUT"]),
+    # Otherwise urllib3 would still retry 429/503 responses carrying Retry-After, out of the limiter's sight.
+    respect_retry_after_header=False,
+    raise_on_status=False,
+)
+
+# Rendered pages are kept next to mkdocs.yml so unchanged pages are neither re-rendered nor re-uploaded.
+CACHE_FILE_NAME = ".mkdocs_confluence_cache.json"
+CACHE_VERSION = 1
+
+
+def cql_string(value):
+    """Quotes a value for a CQL query, escaping backslashes and double quotes."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def dump_json(data):
+    """Serialises a request body to UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class RateLimiter:
+    """Adaptive client-side limiter for Confluence REST calls.
+
+    Every response is inspected for the Confluence rate limit headers: requests are paused for
+    ``Retry-After`` seconds (or briefly when fewer than 10% of the quota remains), a sliding window
+    keeps the request rate below the limit advertised by the server, and the number of requests in
+    flight follows an AIMD rule (+0.5 on success, halved on 429/5xx). Throttled responses without
+    ``Retry-After`` pause all requests with an exponential backoff.
+    """
+
+    def __init__(self, max_concurrency, low_quota_ratio=0.1, low_quota_pause=1.0):
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.low_quota_ratio = low_quota_ratio
+        self.low_quota_pause = low_quota_pause
+        self.rate_limit = None
+        self.rate_interval = 60.0
+        self.in_flight = 0
+        self.pause_until = 0.0
+        self.backoff = 0.0
+        self.window = collections.deque()
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                delay = self.pause_until - now
+                if delay <= 0 and self.rate_limit:
+                    while self.window and now - self.window[0] >= self.rate_interval:
+                        self.window.popleft()
+                    if len(self.window) >= self.rate_limit:
+                        delay = self.rate_interval - (now - self.window[0])
+                if delay > 0:
+                    self.condition.wait(delay)
+                elif self.in_flight >= int(self.concurrency):
+                    self.condition.wait()
+                else:
+                    break
+            self.in_flight += 1
+            # Confluence Server/DC advertises no quota: nothing to count, and the window would never be pruned.
+            if self.rate_limit:
+                self.window.append(now)
+
+    def release(self, response):
+        with self.condition:
+            self.in_flight -= 1
+            if response is None or response.status_code == 429 or response.status_code >= 500:
+                self.concurrency = max(1.0, self.concurrency * 0.5)
+            else:
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 0.5)
+            if response is not None:
+                self._read_headers(response.headers)
+            if response is not None and response.status_code in THROTTLE_STATUSES:
+                self.backoff = min(float(RETRY_BACKOFF_MAX), self.backoff * 2 or self.low_quota_pause)
+                if not response.headers.get("Retry-After"):
+                    self.pause_until = max(self.pause_until, time.monotonic() + self.backoff)
+            else:
+                self.backoff = 0.0
+            self.condition.notify_all()
+
+    def _read_headers(self, headers):
+        limit = headers.get("X-RateLimit-Limit")
+        if limit and limit.isdigit() and self.rate_limit is None:
+            # Seed the sliding window from the first response advertising the quota.
+            self.rate_limit = max(1, int(limit))
+            interval = headers.get("X-RateLimit-Interval-Seconds")
+            if interval and interval.isdigit():
+                self.rate_interval = float(interval)
+        pause = 0.0
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                pause = float(retry_after)
+            except ValueError:
+                pause = self.low_quota_pause
+        remaining = headers.get("X-RateLimit-Remaining")
+        if not pause and remaining and remaining.isdigit() and self.rate_limit:
+            if int(remaining) < self.rate_limit * self.low_quota_ratio:
+                pause = self.low_quota_pause
+        if pause:
+            self.pause_until = max(self.pause_until, time.monotonic() + pause)
+
+
+class MultipartUpload:
+    """multipart/form-data body of an attachment upload, streamed from the open file.
+
+    requests sends file-like bodies block by block and takes the Content-Length from len(), so the
+    upload never holds the whole attachment in memory; tell()/seek() let urllib3 rewind it on retries.
+    """
+
+    def __init__(self, file, filename, content_type, comment):
+        boundary = uuid.uuid4().hex
+        filename = filename.replace('"', "%22")
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self.tail = (
+            f"\r\n--{boundary}\r\n"
+            'Content-Disposition: form-data; name="comment"\r\n\r\n'
+            f"{comment}\r\n"
+            f"--{boundary}--\r\n"
+        ).encode("utf-8")
+        self.file = file
+        self.file_size = os.fstat(file.fileno()).st_size
+        self.position = 0
+
+    def __len__(self):
+        return len(self.head) + self.file_size + len(self.tail)
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += len(self)
+        self.position = max(0, min(offset, len(self)))
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self) - self.position
+        chunks = []
+        file_end = len(self.head) + self.file_size
+        while size > 0 and self.position < len(self):
+            if self.position < len(self.head):
+                chunk = self.head[self.position : self.position + size]
+            elif self.position < file_end:
+                self.file.seek(self.position - len(self.head))
+                chunk = self.file.read(min(size, file_end - self.position))
+                if not chunk:
+                    raise IOError(f"{self.file.name} changed size during upload")
+            else:
+                start = self.position - file_end
+                chunk = self.tail[start : start + size]
+            chunks.append(chunk)
+            self.position += len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+
+class ConfluenceSession(requests.Session):
+    """requests session that routes every call, and every retry of a throttled call, through a RateLimiter."""
+
+    def __init__(self, rate_limiter):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+
+    def request(self, method, url, *args, **kwargs):
+        # Streamed bodies (attachment uploads) are rewound before they are sent again.
+        body = kwargs.get("data")
+        start = body.tell() if hasattr(body, "seek") else None
+        response = None
+        for attempt in range(THROTTLE_RETRIES + 1):
+            if attempt:
+                log.debug("THROTTLED (%s): RETRYING %s %s", response.status_code, method, url)
+                if start is not None:
+                    body.seek(start)
+            self.rate_limiter.acquire()
+            response = None
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            finally:
+                self.rate_limiter.release(response)
+            if response.status_code not in THROTTLE_STATUSES:
+                break
+        return response
 
 
 # PYLINT_COMMENT: plugin.py:35:0: C0115: Missing class docstring (missing-class-docstring)
@@ -72,7 +306,6 @@ class DummyFile(object):
 # PYLINT_COMMENT: How to fix: Review attributes. Some (like `page_title`, `section_title` if only used temporarily in `on_nav`) might be refactored to be local variables or passed as parameters. Alternatively, group related attributes into a separate data class/object if logical. If all are necessary, this warning can be locally disabled.
 # PYLINT_COMMENT: Why: Many instance attributes can make a class harder to understand and maintain.
 class MkdocsWithConfluence(BasePlugin):
-    _id = 0
     config_scheme = (
         ("host_url", config_options.Type(str, default=None)),
         ("space", config_options.Type(str, default=None)),
@@ -84,87 +317,77 @@ class MkdocsWithConfluence(BasePlugin):
         ("verbose", config_options.Type(bool, default=False)),
         ("debug", config_options.Type(bool, default=False)),
         ("dryrun", config_options.Type(bool, default=False)),
+        ("threads", config_options.Type(int, default=SYNC_WORKERS)),
     )
 
+    # Nav listing built in on_nav: indented lines in nav order, and the line of every title for O(1) lookups.
+    tab_nav = []
+    tab_by_title = {}
+
+    # Shared by every plugin instance of the process (e.g. the rebuilds of `mkdocs serve`), so the pooled
+    # keep-alive connections and TLS sessions to Confluence survive from one build to the next.
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls, connections):
+        """Returns the shared session, rebuilt when the number of pooled connections it needs has changed."""
+        with cls._session_lock:
+            if cls._session is None or cls._session.rate_limiter.max_concurrency != connections:
+                if cls._session is not None:
+                    cls._session.close()
+                session = ConfluenceSession(RateLimiter(connections))
+                session.headers.update({"User-Agent": "mkdocs-with-confluence"})
+                adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections, max_retries=RETRY_POLICY)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                cls._session = session
+            return cls._session
+
     def __init__(self):
         self.enabled = True
         self.confluence_renderer = ConfluenceRenderer(use_xhtml=True)
         self.confluence_mistune = mistune.Markdown(renderer=self.confluence_renderer)
         self.simple_log = False
         self.flen = 1
-        self.session = requests.Session()
-        self.page_attachments = {}
+        # Sized from the threads option, see on_config.
+        self.session = None
+        self.page_queue = []
+        self.hierarchy_lock = threading.Lock()
+        self.progress_lock = threading.Lock()
+        self.synced_pages = 0
+        self.progress_filled = -1
+        self.content_url = None
+        self.cache_path = None
+        self.cache = {}
+        # Page ids, versions and parent titles by (space, title), filled by lookups and by our own creates and updates.
+        self.page_id_cache = {}
+        self.page_version_cache = {}
+        self.page_parent_cache = {}
+        self.page_cache_lock = threading.Lock()
+        # Attachment files hashed during the current build, the others are dropped from the cache.
+        self.hashed_files = set()
         # PYLINT_COMMENT: Consider initializing attributes like self.dryrun here (e.g., self.dryrun = False) to address W0201 later.
-        # PYLINT_COMMENT: Attributes like self.page_title, self.page_local_path etc. if they are intended to be instance attributes, should also be initialized here, e.g. self.page_title = None.
 
     # PYLINT_COMMENT: plugin.py:59:4: W0221: Number of parameters was 2 in 'BasePlugin.on_nav' and is now 4 in overriding 'MkdocsWithConfluence.on_nav' method (arguments-differ)
     # PYLINT_COMMENT: How to fix: Ensure the method signature matches the parent class `BasePlugin.on_nav(self, nav, **kwargs)`. If `config` and `files` are needed, they should be part of `**kwargs` or the parent method signature should be checked for compatibility. MkDocs plugin event methods usually have specific signatures like `on_nav(self, nav, config, files)`. If `BasePlugin` is a custom base, update it. If it's MkDocs' `BasePlugin`, this signature is standard. This Pylint warning might be a false positive if the `BasePlugin` definition Pylint sees is incorrect or outdated.
     # PYLINT_COMMENT: Why: Overridden methods should have compatible signatures with their parent methods to maintain polymorphism and prevent unexpected errors.
     def on_nav(self, nav, config, files):
         MkdocsWithConfluence.tab_nav = []
-        # PYLINT_COMMENT: plugin.py:61:27: C2801: Unnecessarily calls dunder method __repr__. Use repr built-in function. (unnecessary-dunder-call)
-        # PYLINT_COMMENT: How to fix: Change `nav.__repr__()` to `repr(nav)`.
-        # PYLINT_COMMENT: Why: `repr()` is the idiomatic way to get the string representation an object is designed to provide via its `__repr__` method. Direct dunder calls are generally discouraged.
-        navigation_items = nav.__repr__()
-
-        for n in navigation_items.split("\n"):
-            leading_spaces = len(n) - len(n.lstrip(" "))
-            spaces = leading_spaces * " "
-            if "Page" in n:
-                try:
-                    # PYLINT_COMMENT: plugin.py:68:20: W0201: Attribute 'page_title' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: How to fix: Initialize `self.page_title = None` (or a suitable default) in the `__init__` method.
-                    # PYLINT_COMMENT: Why: All instance attributes should ideally be declared in `__init__` for clarity and to ensure they always exist.
-                    self.page_title = self.__get_page_title(n)
-                    if self.page_title is None:
-                        raise AttributeError
-                except AttributeError:
-                    # PYLINT_COMMENT: plugin.py:72:20: W0201: Attribute 'page_local_path' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: How to fix: Initialize `self.page_local_path = None` in `__init__`.
-                    # PYLINT_COMMENT: Why: Clarity and ensuring attribute existence.
-                    self.page_local_path = self.__get_page_url(n)
-                    print(
-                        f"WARN     - Page from path {self.page_local_path} has no"
-                        f"         entity in the mkdocs.yml nav section. It will be uploaded"
-                        f"         to the Confluence, but you may not see it on the web server!"
-                    )
-                    # PYLINT_COMMENT: plugin.py:78:20: W0201: Attribute 'page_local_name' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: How to fix: Initialize `self.page_local_name = None` in `__init__`.
-                    # PYLINT_COMMENT: Why: Clarity and ensuring attribute existence.
-                    self.page_local_name = self.__get_page_name(n)
-                    # PYLINT_COMMENT: plugin.py:79:20: W0201: Attribute 'page_title' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: (Already noted above, ensure it's initialized in __init__)
-                    self.page_title = self.page_local_name
-
-                p = spaces + self.page_title
-                MkdocsWithConfluence.tab_nav.append(p)
-            if "Section" in n:
-                try:
-                    # PYLINT_COMMENT: plugin.py:85:20: W0201: Attribute 'section_title' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: How to fix: Initialize `self.section_title = None` in `__init__`.
-                    # PYLINT_COMMENT: Why: Clarity and ensuring attribute existence.
-                    self.section_title = self.__get_section_title(n)
-                    if self.section_title is None:
-                        raise AttributeError
-                except AttributeError:
-                    # PYLINT_COMMENT: plugin.py:89:20: W0201: Attribute 'section_local_path' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: How to fix: Initialize `self.section_local_path = None` in `__init__`.
-                    # PYLINT_COMMENT: Why: Clarity and ensuring attribute existence.
-                    self.section_local_path = self.__get_page_url(n)
-                    print(
-                        f"WARN     - Section from path {self.section_local_path} has no"
-                        f"         entity in the mkdocs.yml nav section. It will be uploaded"
-                        f"         to the Confluence, but you may not see it on the web server!"
-                    )
-                    # PYLINT_COMMENT: plugin.py:95:20: W0201: Attribute 'section_local_name' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: How to fix: Initialize `self.section_local_name = None` in `__init__`.
-                    # PYLINT_COMMENT: Why: Clarity and ensuring attribute existence.
-                    self.section_local_name = self.__get_section_title(n) # This seems to be calling __get_section_title again, might be a bug, maybe intended self.__get_section_name(n)?
-                    # PYLINT_COMMENT: plugin.py:96:20: W0201: Attribute 'section_title' defined outside __init__ (attribute-defined-outside-init)
-                    # PYLINT_COMMENT: (Already noted above, ensure it's initialized in __init__)
-                    self.section_title = self.section_local_name
-                s = spaces + self.section_title
-                MkdocsWithConfluence.tab_nav.append(s)
+        MkdocsWithConfluence.tab_by_title = {}
+        for depth, title in self._walk_nav(nav.items):
+            line = depth * "    " + title
+            MkdocsWithConfluence.tab_nav.append(line)
+            MkdocsWithConfluence.tab_by_title.setdefault(title, line)
+
+    def _walk_nav(self, items, depth=0):
+        for item in items:
+            if item.is_section:
+                yield depth, item.title
+                yield from self._walk_nav(item.children, depth + 1)
+            elif item.is_page:
+                # Pages without a title in the mkdocs.yml nav only get one once their markdown is read.
+                yield depth, item.title or os.path.splitext(os.path.basename(item.file.src_path))[0]
 
     # PYLINT_COMMENT: plugin.py:100:4: W0221: Number of parameters was 1 in 'BasePlugin.on_files' and is now 3 in overriding 'MkdocsWithConfluence.on_files' method (arguments-differ)
     # PYLINT_COMMENT: How to fix: Similar to `on_nav`, check the expected signature for `on_files` in `BasePlugin`. MkDocs standard is `on_files(self, files, config)`. If `BasePlugin` is custom, align them. If Pylint's view of MkDocs' `BasePlugin` is outdated, this might be a false positive.
@@ -194,34 +417,20 @@ class MkdocsWithConfluence(BasePlugin):
             self.simple_log = False
 
     def on_config(self, config):
-        if "enabled_if_env" in self.config:
-            env_name = self.config["enabled_if_env"]
-            if env_name:
-                self.enabled = os.environ.get(env_name) == "1"
-                if not self.enabled:
-                    print(
-                        "WARNING - Mkdocs With Confluence: Exporting MKDOCS pages to Confluence turned OFF: "
-                        f"(set environment variable {env_name} to 1 to enable)"
-                    )
-                    return
-                # PYLINT_COMMENT: plugin.py:120:16: R1705: Unnecessary "else" after "return", remove the "else" and de-indent the code inside it (no-else-return)
-                # PYLINT_COMMENT: How to fix: Remove the `else:` and unindent the following block.
-                # PYLINT_COMMENT: Why: When an `if` block contains a `return`, the `else` is redundant because the code in the `else` block will only be reached if the `if` condition was false.
-                else:
-                    print(
-                        "INFO     -  Mkdocs With Confluence: Exporting MKDOCS pages to Confluence "
-                        f"turned ON by var {env_name}==1!"
-                    )
-                    self.enabled = True # This is redundant if already set based on env var.
-            else:
-                print(
-                    "WARNING -  Mkdocs With Confluence: Exporting MKDOCS pages to Confluence turned OFF: "
-                    f"(set environment variable {env_name} to 1 to enable)"
-                )
-                return # Missing return if env_name is None but "enabled_if_env" key exists. This branch implies it's disabled.
-        else:
-            print("INFO     -  Mkdocs With Confluence: Exporting MKDOCS pages to Confluence turned ON by default!")
-            self.enabled = True
+        # debug: true shows the plugin's debug messages without -v; otherwise they follow mkdocs' own level.
+        log.setLevel(logging.DEBUG if self.config["debug"] else logging.NOTSET)
+        # Every REST endpoint used by the plugin lives under this URL.
+        self.content_url = (self.config["host_url"] or "").rstrip("/") + "/rest/api/content"
+        self.cache_path = os.path.join(os.path.dirname(config["config_file_path"] or ""), CACHE_FILE_NAME)
+        self.cache = self._load_cache()
+        self.page_id_cache = {}
+        self.page_version_cache = {}
+        self.page_parent_cache = {}
+        if self.config["threads"] < 1:
+            log.warning("Mkdocs With Confluence: threads must be at least 1, got %s; using 1", self.config["threads"])
+            self.config["threads"] = 1
+        # One pooled keep-alive connection per page or attachment worker.
+        self.session = self._get_session(self.config["threads"] + ATTACHMENT_WORKERS)
 
         if self.config["dryrun"]:
             print("WARNING -  Mkdocs With Confluence - DRYRUN MODE turned ON")
@@ -234,61 +443,52 @@ class MkdocsWithConfluence(BasePlugin):
             # PYLINT_COMMENT: (Already noted above)
             self.dryrun = False
 
+        # Checked once per build instead of on every page.
+        missing = [name for name in ("host_url", "space", "username") if not self.config[name]]
+        if missing:
+            log.error("Mkdocs With Confluence: missing config value(s) %s, exporting turned OFF", ", ".join(missing))
+            self.enabled = False
+            return
+
+        # mkdocs fills in every option of config_scheme, so an unset enabled_if_env is None.
+        env_name = self.config["enabled_if_env"]
+        if env_name:
+            self.enabled = os.environ.get(env_name) == "1"
+            if not self.enabled:
+                print(
+                    "WARNING - Mkdocs With Confluence: Exporting MKDOCS pages to Confluence turned OFF: "
+                    f"(set environment variable {env_name} to 1 to enable)"
+                )
+                return
+            print(
+                "INFO     -  Mkdocs With Confluence: Exporting MKDOCS pages to Confluence "
+                f"turned ON by var {env_name}==1!"
+            )
+        else:
+            print("INFO     -  Mkdocs With Confluence: Exporting MKDOCS pages to Confluence turned ON by default!")
+            self.enabled = True
+
     # PYLINT_COMMENT: plugin.py:148:4: W0221: Number of parameters was 3 in 'BasePlugin.on_page_markdown' and is now 5 in overriding 'MkdocsWithConfluence.on_page_markdown' method (arguments-differ)
     # PYLINT_COMMENT: How to fix: Check `BasePlugin` for `on_page_markdown`'s signature. MkDocs standard is `on_page_markdown(self, markdown, page, config, files)`. Similar reasoning as `on_nav`.
     # PYLINT_COMMENT: Why: Method signature consistency.
-    # PYLINT_COMMENT: plugin.py:148:4: R0914: Too many local variables (26/15) (too-many-locals)
-    # PYLINT_COMMENT: How to fix: Refactor the method. Extract parts of its logic into smaller helper methods. This can reduce the number of variables needed in the main method's scope.
-    # PYLINT_COMMENT: Why: Methods with too many local variables can be hard to follow and debug.
-    # PYLINT_COMMENT: plugin.py:148:4: R0912: Too many branches (58/12) (too-many-branches)
-    # PYLINT_COMMENT: How to fix: Refactor into smaller methods. Complex conditional logic can often be simplified or encapsulated.
-    # PYLINT_COMMENT: Why: High branching complexity makes code harder to test, understand, and maintain.
-    # PYLINT_COMMENT: plugin.py:148:4: R0915: Too many statements (134/50) (too-many-statements)
-    # PYLINT_COMMENT: How to fix: Break down this very long method into several smaller, more focused helper methods.
-    # PYLINT_COMMENT: Why: Long methods are difficult to read, understand, and maintain.
     def on_page_markdown(self, markdown, page, config, files):
-        MkdocsWithConfluence._id += 1
         if self.config["api_token"]:
             self.session.auth = (self.config["username"], self.config["api_token"])
         else:
             self.session.auth = (self.config["username"], self.config["password"])
 
         if self.enabled:
-            if self.simple_log is True:
-                print("INFO     - Mkdocs With Confluence: Page export progress: [", end="", flush=True)
-                for i in range(MkdocsWithConfluence._id):
-                    print("#", end="", flush=True)
-                # PYLINT_COMMENT: plugin.py:160:20: W0612: Unused variable 'j' (unused-variable)
-                # PYLINT_COMMENT: How to fix: If 'j' is truly not needed, replace `for j in ...` with `for _ in ...`.
-                # PYLINT_COMMENT: Why: Unused variables can be confusing and might indicate a bug or incomplete logic.
-                for j in range(self.flen - MkdocsWithConfluence._id):
-                    print("-", end="", flush=True)
-                print(f"] ({MkdocsWithConfluence._id} / {self.flen})", end="\r", flush=True)
-
-            if self.config["debug"]:
-                print(f"\nDEBUG     - Handling Page '{page.title}' (And Parent Nav Pages if necessary):\n")
-            if not all(self.config_scheme): # This check seems logically flawed. config_scheme is a definition, not values.
-                                          # It likely intends to check if required self.config values are present.
-                print("DEBUG     - ERR: YOU HAVE EMPTY VALUES IN YOUR CONFIG. ABORTING")
-                return markdown
+            log.debug("Handling Page '%s' (And Parent Nav Pages if necessary)", page.title)
 
             try:
-                if self.config["debug"]:
-                    print("DEBUG     - Get section first parent title...: ")
-                try:
-                    # PYLINT_COMMENT: plugin.py:175:54: C2801: Unnecessarily calls dunder method __repr__. Use repr built-in function. (unnecessary-dunder-call)
-                    # PYLINT_COMMENT: How to fix: Change `page.ancestors[0].__repr__()` to `repr(page.ancestors[0])`.
-                    # PYLINT_COMMENT: Why: Use the `repr()` built-in.
-                    parent = self.__get_section_title(page.ancestors[0].__repr__())
-                except IndexError as e:
-                    if self.config["debug"]:
-                        print(
-                            f"DEBUG     - WRN({e}): No first parent! Assuming "
-                            f"DEBUG     - {self.config['parent_page_name']}..."
-                        )
+                # Ancestors are the nav sections containing the page, innermost first.
+                ancestors = page.ancestors
+                if ancestors:
+                    parent = ancestors[0].title
+                else:
+                    log.debug("WRN: No first parent! Assuming %s...", self.config["parent_page_name"])
                     parent = None
-                if self.config["debug"]:
-                    print(f"DEBUG     - {parent}")
+                log.debug("%s", parent)
                 if not parent:
                     parent = self.config["parent_page_name"]
 
@@ -297,226 +497,313 @@ class MkdocsWithConfluence(BasePlugin):
                 else:
                     main_parent = self.config["space"] # main_parent can be space name if parent_page_name is not set.
 
-                if self.config["debug"]:
-                    print("DEBUG     - Get section second parent title...: ")
-                try:
-                    # PYLINT_COMMENT: plugin.py:196:55: C2801: Unnecessarily calls dunder method __repr__. Use repr built-in function. (unnecessary-dunder-call)
-                    # PYLINT_COMMENT: How to fix: Change `page.ancestors[1].__repr__()` to `repr(page.ancestors[1])`.
-                    # PYLINT_COMMENT: Why: Use the `repr()` built-in.
-                    parent1 = self.__get_section_title(page.ancestors[1].__repr__())
-                except IndexError as e:
-                    if self.config["debug"]:
-                        print(
-                            f"DEBUG     - ERR({e}) No second parent! Assuming "
-                            f"second parent is main parent: {main_parent}..."
-                        )
+                if len(ancestors) > 1:
+                    parent1 = ancestors[1].title
+                else:
+                    log.debug("No second parent! Assuming second parent is main parent: %s...", main_parent)
                     parent1 = None
-                if self.config["debug"]:
-                    print(f"{parent}") # This prints 'parent', did you mean 'parent1'?
+                log.debug("%s", parent1)
 
                 if not parent1:
                     parent1 = main_parent
-                    if self.config["debug"]:
-                        print(
-                            f"DEBUG     - ONLY ONE PARENT FOUND. ASSUMING AS A "
-                            f"FIRST NODE after main parent config {main_parent}"
-                        )
-
-                if self.config["debug"]:
-                    print(f"DEBUG     - PARENT0: {parent}, PARENT1: {parent1}, MAIN PARENT: {main_parent}")
-
-                # PYLINT_COMMENT: plugin.py:218:21: R1732: Consider using 'with' for resource-allocating operations (consider-using-with)
-                # PYLINT_COMMENT: How to fix: Use `with tempfile.NamedTemporaryFile(delete=False, mode="w", encoding="utf-8") as tf:`
-                # PYLINT_COMMENT: Why: `with` statement ensures resources are properly managed (e.g., file is closed automatically). `delete=False` is tricky, ensure cleanup.
-                tf = tempfile.NamedTemporaryFile(delete=False)
-                # PYLINT_COMMENT: plugin.py:219:20: R1732: Consider using 'with' for resource-allocating operations (consider-using-with)
-                # PYLINT_COMMENT: How to fix: If tf is managed with `with`, this `open` might be part of it or use `with open(tf.name, "w", encoding="utf-8") as f:`.
-                # PYLINT_COMMENT: Why: Ensures file is closed.
-                # PYLINT_COMMENT: plugin.py:219:20: W1514: Using open without explicitly specifying an encoding (unspecified-encoding)
-                # PYLINT_COMMENT: How to fix: Add `encoding="utf-8"` (or another appropriate encoding) to the `open()` call: `f = open(tf.name, "w", encoding="utf-8")`.
-                # PYLINT_COMMENT: Why: Makes the code platform-independent and less prone to encoding errors.
-                f = open(tf.name, "w")
-
-                attachments = []
-                try:
-                    for match in re.finditer(r'img src="file://(.*)" s', markdown): # Regex looks suspicious: ' s' at the end.
-                        if self.config["debug"]:
-                            print(f"DEBUG     - FOUND IMAGE: {match.group(1)}")
-                        attachments.append(match.group(1))
-                    for match in re.finditer(r"!\[[\w\. -]*\]\((?!http|file)([^\s,]*).*\)", markdown):
-                        file_path = match.group(1).lstrip("./\\")
-                        attachments.append(file_path)
-
-                        if self.config["debug"]:
-                            print(f"DEBUG     - FOUND IMAGE: {file_path}")
-                        # This path manipulation might be fragile:
-                        attachments.append("docs/" + file_path.replace("../", ""))
-
-                except AttributeError as e: # This except may not be correctly placed for re.finditer
-                    if self.config["debug"]:
-                        print(f"DEBUG     - WARN(({e}): No images found in markdown. Proceed..")
-                new_markdown = re.sub(
-                    r'<img src="file:///tmp/', '<p><ac:image ac:height="350"><ri:attachment ri:filename="', markdown # Hardcoded /tmp/
-                )
-                new_markdown = re.sub(r'" style="page-break-inside: avoid;">', '"/></ac:image></p>', new_markdown)
-                confluence_body = self.confluence_mistune(new_markdown)
-                f.write(confluence_body)
-                if self.config["debug"]:
-                    print(confluence_body)
-                page_name = page.title
-                new_name = "confluence_page_" + page_name.replace(" ", "_") + ".html"
-                shutil.copy(f.name, new_name)
-                f.close() # Should be in a finally block if not using 'with'
+                    log.debug(
+                        "ONLY ONE PARENT FOUND. ASSUMING AS A FIRST NODE after main parent config %s", main_parent
+                    )
 
+                log.debug("PARENT0: %s, PARENT1: %s, MAIN PARENT: %s", parent, parent1, main_parent)
+
+                # Images are resolved to absolute paths next to the page's source, so an image referenced
+                # several times (or both as HTML and markdown) is uploaded only once.
+                attachments = set()
+                page_dir = os.path.dirname(page.file.abs_src_path)
+
+                def collect_image(match):
+                    file_path = match.group("file")
+                    if file_path is not None:
+                        log.debug("FOUND IMAGE: %s", file_path)
+                        attachments.add(file_path)
+                        if file_path.startswith(RENDERED_IMAGE_DIR):
+                            return (
+                                '<p><ac:image ac:height="350"><ri:attachment ri:filename="'
+                                f'{os.path.basename(file_path)}"/></ac:image></p>'
+                            )
+                        return match.group(0)
+                    file_path = match.group("md")
+                    log.debug("FOUND IMAGE: %s", file_path)
+                    source_path = os.path.normpath(os.path.join(page_dir, file_path))
+                    if os.path.isfile(source_path):
+                        attachments.add(source_path)
+                    else:
+                        # Not next to the sources (e.g. generated during the build): looked up in site_dir later.
+                        attachments.add(file_path.lstrip("./\\"))
+                    return match.group(0)
+
+                new_markdown = IMAGE_RE.sub(collect_image, markdown)
+                markdown_hash = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+                cached_page = self.cache["pages"].get(page.file.src_path)
+                if cached_page is not None and cached_page["hash"] == markdown_hash:
+                    confluence_body = cached_page["body"]
+                else:
+                    # The renderer collects per-document state (title, attachments);
+                    # reset it so it doesn't grow with every page.
+                    self.confluence_renderer.reinit()
+                    confluence_body = self.confluence_mistune(new_markdown)
+                    cached_page = {"hash": markdown_hash, "body": confluence_body, "uploaded": False}
+                    self.cache["pages"][page.file.src_path] = cached_page
                 if self.config["debug"]:
-                    print(
-                        f"\nDEBUG     - UPDATING PAGE TO CONFLUENCE, DETAILS:\n"
-                        f"DEBUG     - HOST: {self.config['host_url']}\n"
-                        f"DEBUG     - SPACE: {self.config['space']}\n"
-                        f"DEBUG     - TITLE: {page.title}\n"
-                        f"DEBUG     - PARENT: {parent}\n"
-                        f"DEBUG     - BODY: {confluence_body}\n" # This can be very long for debug output
+                    # Rendered storage format is kept next to the build for inspection in debug runs only.
+                    Path("confluence_page_" + page.title.replace(" ", "_") + ".html").write_text(
+                        confluence_body, encoding="utf-8"
                     )
 
-                page_id = self.find_page_id(page.title)
-                if page_id is not None:
-                    if self.config["debug"]:
-                        print(
-                            f"DEBUG     - JUST ONE STEP FROM UPDATE OF PAGE '{page.title}' \n"
-                            f"DEBUG     - CHECKING IF PARENT PAGE ON CONFLUENCE IS THE SAME AS HERE"
-                        )
-
-                    parent_name = self.find_parent_name_of_page(page.title)
+                # Lazy %s arguments: the (possibly huge) body is only formatted when debug output is on.
+                log.debug(
+                    "QUEUEING PAGE FOR CONFLUENCE UPLOAD, DETAILS:\n"
+                    "HOST: %s\nSPACE: %s\nTITLE: %s\nPARENT: %s\nBODY: %s",
+                    self.config["host_url"],
+                    self.config["space"],
+                    page.title,
+                    parent,
+                    confluence_body,
+                )
 
-                    if parent_name == parent:
-                        if self.config["debug"]:
-                            print("DEBUG     - Parents match. Continue...")
-                    else:
-                        if self.config["debug"]:
-                            print(f"DEBUG     - ERR, Parents does not match: '{parent}' =/= '{parent_name}' Aborting...")
-                        return markdown # Early return if parents don't match
-                    self.update_page(page.title, confluence_body)
-                    for i in MkdocsWithConfluence.tab_nav:
-                        if page.title in i:
-                            print(f"INFO     - Mkdocs With Confluence: {i} *UPDATE*")
-                else: # page_id is None, so create page and potentially parents
-                    if self.config["debug"]:
-                        print(
-                            f"DEBUG     - PAGE: {page.title}, PARENT0: {parent}, "
-                            f"PARENT1: {parent1}, MAIN PARENT: {main_parent}"
-                        )
-                    parent_id = self.find_page_id(parent) # Re-fetch parent_id; it was already fetched for 'parent' name
-                    self.wait_until(parent_id, 1, 20) # This wait_until logic might be flawed.
-                                                     # It waits if parent_id is None, doesn't re-fetch.
-                    second_parent_id = self.find_page_id(parent1)
-                    self.wait_until(second_parent_id, 1, 20)
-                    main_parent_id = self.find_page_id(main_parent) # ID for space name? Confluence API usually doesn't provide page ID for space itself.
-
-                    if not parent_id: # parent (ancestor[0]) does not exist
-                        if not second_parent_id: # parent1 (ancestor[1]) does not exist
-                            # main_parent_id = self.find_page_id(main_parent) # Fetched again
-                            if not main_parent_id:
-                                # This typically means the "parent_page_name" from config (or space itself if parent_page_name is None) wasn't found.
-                                # If main_parent is the space key, find_page_id might not work as expected unless there's a page titled with the space key.
-                                print("ERR: MAIN PARENT UNKNOWN. ABORTING!")
-                                return markdown
-
-                            if self.config["debug"]:
-                                print(
-                                    f"DEBUG     - Trying to ADD page '{parent1}' to " # parent1 is the first to be created under main_parent
-                                    f"main parent({main_parent}) ID: {main_parent_id}"
-                                )
-                            body = TEMPLATE_BODY.replace("TEMPLATE", parent1)
-                            self.add_page(parent1, main_parent_id, body)
-                            for i_tab in MkdocsWithConfluence.tab_nav: # Renamed 'i' to 'i_tab' for clarity
-                                if parent1 in i_tab:
-                                    print(f"INFO     - Mkdocs With Confluence: {i_tab} *NEW PAGE*")
-                            time.sleep(1) # Allow Confluence to process
-                            second_parent_id = self.find_page_id(parent1) # Get ID of newly created parent1
-
-                        # Now, second_parent_id should exist (either found or created)
-                        # Create 'parent' under 'parent1'
-                        if self.config["debug"]:
-                            print(
-                                f"DEBUG     - Trying to ADD page '{parent}' "
-                                f"to parent1({parent1}) ID: {second_parent_id}"
-                            )
-                        body = TEMPLATE_BODY.replace("TEMPLATE", parent)
-                        # If second_parent_id is still None here (e.g. creation failed or main_parent was space), this will fail.
-                        self.add_page(parent, second_parent_id, body)
-                        for i_tab in MkdocsWithConfluence.tab_nav:
-                            if parent in i_tab:
-                                print(f"INFO     - Mkdocs With Confluence: {i_tab} *NEW PAGE*")
-                        time.sleep(1)
-                        parent_id = self.find_page_id(parent) # Get ID of newly created parent
-
-                    # Retry loop for adding the actual page if its direct parent_id was initially None
-                    # This retry logic is a bit convoluted and might try to add with parent_id = None
-                    if parent_id is None: # This condition suggests the parent page (parent) was NOT successfully created or found by find_page_id.
-                                         # The previous block should have created `parent` and assigned its ID to `parent_id`.
-                                         # This retry loop might be redundant or indicate an issue in the logic above.
-                        for i_retry in range(11): # Renamed 'i'
-                            # The `while parent_id is None:` loop inside the `for` loop is problematic.
-                            # If `parent_id` is `None`, it will enter the `while`.
-                            # If `add_page` throws HTTPError, it sleeps, calls `find_page_id`, and then `break`s the `while` loop.
-                            # The outer `for` loop continues. This structure needs careful review.
-                            while parent_id is None: # This should ideally not be needed if parent creation logic above is robust.
-                                try:
-                                    # If parent_id is None, this add_page call will likely fail if parent_id is required.
-                                    self.add_page(page.title, parent_id, confluence_body)
-                                    # If add_page succeeds (which is unlikely if parent_id is None and required), then parent_id would still be None here
-                                    # leading to an infinite loop unless add_page itself sets self.parent_id or something similar which is not the case.
-                                    # This loop seems to be trying to add the child page repeatedly with a potentially None parent_id.
-                                    break # Exit while if add_page succeeds.
-                                except requests.exceptions.HTTPError:
-                                    print(
-                                        f"ERR     - HTTP error on adding page. It probably occured due to "
-                                        f"parent ID('{parent_id}') page is not YET synced on server. Retry nb {i_retry}/10..."
-                                    )
-                                    sleep(5)
-                                    parent_id = self.find_page_id(parent) # Attempt to re-find the PARENT's ID.
-                                    # If parent_id is found, the while loop condition (parent_id is None) becomes false for the next iteration.
-                                # break # This break exits the while loop after one attempt (either success or HTTPError)
-                            if parent_id is not None: # If parent ID was found after retry, break the for loop
-                                break
-                        # If after retries, parent_id is still None, the next add_page will likely fail.
-
-                    # This add_page call happens regardless of the retry loop's success in finding parent_id.
-                    # If parent_id is still None, this will attempt to add with a None parent_id.
-                    self.add_page(page.title, parent_id, confluence_body)
-
-                    # This print might be misleading if parent_id is None
-                    print(f"Trying to ADD page '{page.title}' to parent0({parent}) ID: {parent_id}")
-                    for i_tab in MkdocsWithConfluence.tab_nav:
-                        if page.title in i_tab:
-                            print(f"INFO     - Mkdocs With Confluence: {i_tab} *NEW PAGE*")
-
-                if attachments:
-                    self.page_attachments[page.title] = attachments
+                # Network I/O is deferred to on_post_build, where all queued pages are synced concurrently.
+                self.page_queue.append(
+                    {
+                        "path": page.file.src_path,
+                        "title": page.title,
+                        "body": confluence_body,
+                        "parent": parent,
+                        "parent1": parent1,
+                        "main_parent": main_parent,
+                        "attachments": sorted(attachments),
+                        "cache": cached_page,
+                    }
+                )
 
             except IndexError as e: # This top-level IndexError might catch errors from page.ancestors if not handled by inner try-excepts
-                if self.config["debug"]:
-                    print(f"DEBUG     - ERR({e}): Exception error!") # Generic error message
+                log.debug("ERR(%s): Exception error!", e)
                 return markdown # Consider more specific error handling or logging
 
         return markdown
 
-    # PYLINT_COMMENT: plugin.py:355:4: W0221: Number of parameters was 2 in 'BasePlugin.on_post_page' and is now 4 in overriding 'MkdocsWithConfluence.on_post_page' method (arguments-differ)
-    # PYLINT_COMMENT: How to fix: Check `BasePlugin` for `on_post_page`'s signature. MkDocs standard is `on_post_page(self, output, page, config)`. Similar reasoning as `on_nav`.
-    # PYLINT_COMMENT: Why: Method signature consistency.
-    def on_post_page(self, output, page, config):
-        site_dir = config.get("site_dir")
-        attachments = self.page_attachments.get(page.title, [])
+    def on_post_build(self, config):
+        if not self.enabled or not self.page_queue:
+            return
+        self._flush_uploads(config.get("site_dir"))
+
+    def _flush_uploads(self, site_dir):
+        """Drains the queue filled by on_page_markdown; all Confluence traffic of a build happens here."""
+        self.synced_pages = 0
+        self.progress_filled = -1
+        self.hashed_files = set()
+        # A few CQL searches find every page and parent of the build, instead of one request per title.
+        self.find_page_ids(
+            title
+            for page in self.page_queue
+            for title in (page["title"], page["parent"], page["parent1"], page["main_parent"])
+            if title
+        )
+        site_index = self._index_site_dir(site_dir)
+        # One shared session (connection pool + keep-alive) serves all workers; pages are independent
+        # requests, so the sync time is bound by round-trips rather than by the number of pages.
+        with ThreadPoolExecutor(max_workers=ATTACHMENT_WORKERS) as attachment_executor, ThreadPoolExecutor(
+            max_workers=self.config["threads"]
+        ) as executor:
+            futures = [
+                executor.submit(self._sync_page, page, site_index, attachment_executor) for page in self.page_queue
+            ]
+        self._prune_cache(self.page_queue)
+        self.page_queue = []
+        self._save_cache()
+        if self.simple_log is True:
+            print()
+        for future in futures:
+            future.result()
+
+    def _index_site_dir(self, site_dir):
+        """Maps the file names under site_dir to their paths, walking the tree once per build.
+
+        Only needed for attachments that could not be resolved next to the page's source.
+        """
+        site_index = {}
+        if any(not os.path.isabs(attachment) for page in self.page_queue for attachment in page["attachments"]):
+            for path in Path(site_dir).rglob("*"):
+                if path.is_file():
+                    site_index.setdefault(path.name, []).append(path)
+        return site_index
+
+    def _sync_page(self, page, site_index, attachment_executor):
+        if self._upload_page(page):
+            self._upload_attachments(page["title"], page["attachments"], site_index, attachment_executor)
+        self._report_progress()
+
+    def _report_progress(self):
+        with self.progress_lock:
+            self.synced_pages += 1
+            if self.simple_log is not True:
+                return
+            # The bar has a fixed width and is only redrawn when it grows (or at the end), so the amount of
+            # console output no longer grows with the square of the number of pages.
+            filled = min(self.synced_pages * PROGRESS_BAR_WIDTH // max(self.flen, 1), PROGRESS_BAR_WIDTH)
+            if filled == self.progress_filled and self.synced_pages != self.flen:
+                return
+            self.progress_filled = filled
+            bar = "#" * filled + "-" * (PROGRESS_BAR_WIDTH - filled)
+            print(
+                f"INFO     - Mkdocs With Confluence: Page export progress: [{bar}] ({self.synced_pages} / {self.flen})",
+                end="\r",
+                flush=True,
+            )
+
+    # PYLINT_COMMENT: R0912/R0915: Too many branches/statements. The page/parent creation logic below was moved out of
+    # PYLINT_COMMENT: on_page_markdown unchanged and is still a candidate for splitting into smaller helpers.
+    def _upload_page(self, page):
+        title = page["title"]
+        confluence_body = page["body"]
+        parent = page["parent"]
+        parent1 = page["parent1"]
+        main_parent = page["main_parent"]
+
+        page_id = self.find_page_id(title)
+        if page_id is not None:
+            log.debug("CHECKING IF PARENT PAGE OF '%s' ON CONFLUENCE IS THE SAME AS HERE", title)
+
+            # Checked for unchanged pages too: a page moved in the nav keeps its markdown.
+            parent_name = self.find_parent_name_of_page(title)
+
+            if parent_name == parent:
+                log.debug("Parents match. Continue...")
+            else:
+                log.warning(
+                    "Mkdocs With Confluence: parent of page '%s' is '%s' on Confluence but '%s' here; skipping it",
+                    title,
+                    parent_name,
+                    parent,
+                )
+                return False # Early return if parents don't match
+            if page["cache"]["uploaded"]:
+                # Same markdown as the last successful upload, nothing to send.
+                self._print_nav_status(title, "UNCHANGED")
+            else:
+                self.update_page(title, confluence_body)
+                page["cache"]["uploaded"] = not self.dryrun
+                self._print_nav_status(title, "UPDATE")
+        else: # page_id is None, so create page and potentially parents
+            log.debug("PAGE: %s, PARENT0: %s, PARENT1: %s, MAIN PARENT: %s", title, parent, parent1, main_parent)
+            # Sibling pages are synced concurrently and share parents; only one worker at a time may
+            # look up and create the missing parent pages, so they are never created twice.
+            with self.hierarchy_lock:
+                parent_id = self.find_page_id(parent)
+                second_parent_id = self.find_page_id(parent1)
+                main_parent_id = self.find_page_id(main_parent) # ID for space name? Confluence API usually doesn't provide page ID for space itself.
+
+                if not parent_id: # parent (ancestor[0]) does not exist
+                    if not second_parent_id: # parent1 (ancestor[1]) does not exist
+                        if not main_parent_id:
+                            # This typically means the "parent_page_name" from config (or space itself if parent_page_name is None) wasn't found.
+                            # If main_parent is the space key, find_page_id might not work as expected unless there's a page titled with the space key.
+                            print("ERR: MAIN PARENT UNKNOWN. ABORTING!")
+                            return False
+
+                        # parent1 is the first to be created under main_parent
+                        log.debug(
+                            "Trying to ADD page '%s' to main parent(%s) ID: %s", parent1, main_parent, main_parent_id
+                        )
+                        body = TEMPLATE_BODY.format(title=html.escape(parent1))
+                        # The id comes straight from the create response, no need to wait for the page to be searchable.
+                        second_parent_id = self.add_page(parent1, main_parent_id, body)
+                        self._print_nav_status(parent1, "NEW PAGE")
+
+                    # Now, second_parent_id should exist (either found or created)
+                    # Create 'parent' under 'parent1'
+                    log.debug("Trying to ADD page '%s' to parent1(%s) ID: %s", parent, parent1, second_parent_id)
+                    body = TEMPLATE_BODY.format(title=html.escape(parent))
+                    # If second_parent_id is still None here (e.g. creation failed or main_parent was space), this will fail.
+                    parent_id = self.add_page(parent, second_parent_id, body)
+                    self._print_nav_status(parent, "NEW PAGE")
+
+            # Without its parent the page would be created at the top of the space (or rejected), so it is
+            # skipped instead; in dryrun mode the parents are never created, so their id is always None.
+            if parent_id is None and not self.dryrun:
+                log.error("Mkdocs With Confluence: parent '%s' never resolved; skipping page '%s'", parent, title)
+                return False
+
+            # Transient HTTP errors are retried by the session (RETRY_POLICY).
+            self.add_page(title, parent_id, confluence_body)
+            page["cache"]["uploaded"] = not self.dryrun
+
+            print(f"Trying to ADD page '{title}' to parent0({parent}) ID: {parent_id}")
+            self._print_nav_status(title, "NEW PAGE")
+
+        return True
+
+    def _print_nav_status(self, title, status):
+        line = MkdocsWithConfluence.tab_by_title.get(title)
+        if line is not None:
+            print(f"INFO     - Mkdocs With Confluence: {line} *{status}*")
+
+    def _load_cache(self):
+        target = f"{self.config['host_url']} {self.config['space']}"
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        # Entries are only valid for the Confluence space they were uploaded to and the current cache layout.
+        if cache.get("version") != CACHE_VERSION or cache.get("target") != target:
+            cache = {"version": CACHE_VERSION, "target": target, "pages": {}}
+        # SHA-1 of attachment files by path, with the size and mtime they were computed for.
+        cache.setdefault("files", {})
+        # SHA-1 of the attachments on Confluence by page id and file name, as of their last upload or check.
+        cache.setdefault("attachments", {})
+        return cache
+
+    def _prune_cache(self, pages):
+        """Drops the cached pages, file hashes and page attachments not seen in this build."""
+        paths = {page["path"] for page in pages}
+        with self.page_cache_lock:
+            page_ids = {self.page_id_cache.get((self.config["space"], page["title"])) for page in pages}
+        self.cache["pages"] = {path: entry for path, entry in self.cache["pages"].items() if path in paths}
+        self.cache["files"] = {path: entry for path, entry in self.cache["files"].items() if path in self.hashed_files}
+        self.cache["attachments"] = {
+            page_id: entry for page_id, entry in self.cache["attachments"].items() if page_id in page_ids
+        }
 
-        if self.config["debug"]:
-            print(f"\nDEBUG     - UPLOADING ATTACHMENTS TO CONFLUENCE FOR {page.title}, DETAILS:")
-            print(f"FILES: {attachments}   \n")
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f)
+
+    def _upload_attachments(self, page_name, attachments, site_index, executor):
+        log.debug("UPLOADING ATTACHMENTS TO CONFLUENCE FOR %s, DETAILS:\nFILES: %s", page_name, attachments)
+        # dict keeps the first occurrence of every file, so an image referenced twice
+        # is not uploaded concurrently twice.
+        file_paths = {}
         for attachment in attachments:
-            if self.config["debug"]:
-                print(f"DEBUG     - looking for {attachment} in {site_dir}")
-            for p_path in Path(site_dir).rglob(f"*{attachment}"): # Renamed 'p'
-                self.add_or_update_attachment(page.title, p_path)
-        return output
+            if os.path.isabs(attachment) and os.path.isfile(attachment):
+                file_paths[attachment] = None
+                continue
+            log.debug("looking for %s in site_dir", attachment)
+            for p_path in site_index.get(os.path.basename(attachment), []): # Renamed 'p'
+                if p_path.as_posix().endswith("/" + attachment):
+                    file_paths[str(p_path)] = None
+        page_id = self.find_page_id(page_name)
+        if page_id:
+            # Files uploaded by a previous build with the same content need neither the listing nor an upload.
+            uploaded = self.cache["attachments"].get(page_id, {})
+            file_paths = [p for p in file_paths if uploaded.get(os.path.basename(p)) != self.get_file_sha1(p)]
+        if not file_paths:
+            return
+        # One listing request per page tells which attachments exist and with which hash.
+        existing_attachments = self.get_attachments(page_id) if page_id else {}
+        futures = [
+            executor.submit(self.add_or_update_attachment, page_name, p_path, existing_attachments)
+            for p_path in file_paths
+        ]
+        for future in futures:
+            future.result()
 
     # PYLINT_COMMENT: plugin.py:369:4: W0221: Number of parameters was 3 in 'BasePlugin.on_page_content' and is now 5 in overriding 'MkdocsWithConfluence.on_page_content' method (arguments-differ)
     # PYLINT_COMMENT: How to fix: Check `BasePlugin` for `on_page_content`'s signature. MkDocs standard is `on_page_content(self, html, page, config, files)`. Similar reasoning.
@@ -524,69 +811,60 @@ class MkdocsWithConfluence(BasePlugin):
     def on_page_content(self, html, page, config, files):
         return html
 
-    def __get_page_url(self, section):
-        return re.search("url='(.*)'\\)", section).group(1)[:-1] + ".md"
-
-    def __get_page_name(self, section):
-        return os.path.basename(re.search("url='(.*)'\\)", section).group(1)[:-1])
-
-    def __get_section_name(self, section):
-        if self.config["debug"]:
-            print(f"DEBUG     - SECTION name: {section}")
-        return os.path.basename(re.search("url='(.*)'\\/", section).group(1)[:-1])
-
-    def __get_section_title(self, section):
-        if self.config["debug"]:
-            print(f"DEBUG     - SECTION title: {section}")
-        try:
-            r_match = re.search("Section\\(title='(.*)'\\)", section) # Renamed 'r'
-            return r_match.group(1)
-        except AttributeError:
-            name = self.__get_section_name(section)
-            print(f"WRN     - Section '{name}' doesn't exist in the mkdocs.yml nav section!")
-            return name
-
-    def __get_page_title(self, section):
-        try:
-            r_match = re.search("\\s*Page\\(title='(.*)',", section) # Renamed 'r'
-            return r_match.group(1)
-        except AttributeError:
-            name = self.__get_page_url(section) # This gets URL, not just name. Consider self.__get_page_name(section) if consistent.
-            print(f"WRN     - Page '{name}' doesn't exist in the mkdocs.yml nav section!")
-            return name # Returns full URL path as title if not found.
-
     # PYLINT_COMMENT: plugin.py:404:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add a docstring, e.g., """Calculates the SHA1 hash of a file."""
     # PYLINT_COMMENT: Why: Explains what the method does.
     def get_file_sha1(self, file_path):
-        hash_sha1 = hashlib.sha1()
+        # Files whose size and modification time didn't change since the last build are not hashed again.
+        file_path = str(file_path)
+        self.hashed_files.add(file_path)
+        stat = os.stat(file_path)
+        files = self.cache.setdefault("files", {})
+        cached_file = files.get(file_path, {})
+        if (cached_file.get("mtime_ns"), cached_file.get("size")) == (stat.st_mtime_ns, stat.st_size):
+            return cached_file["sha1"]
+        # SHA-1 stays: it is the [v<hash>] tag in the comment of every attachment already uploaded.
         with open(file_path, "rb") as f_in: # Renamed 'f'
-            for chunk in iter(lambda: f_in.read(4096), b""):
-                hash_sha1.update(chunk)
-        return hash_sha1.hexdigest()
-
-    def add_or_update_attachment(self, page_name, filepath):
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+, hashes the whole file in C
+                digest = hashlib.file_digest(f_in, "sha1").hexdigest()
+            else:
+                hash_sha1 = hashlib.sha1()
+                for chunk in iter(lambda: f_in.read(HASH_CHUNK_SIZE), b""):
+                    hash_sha1.update(chunk)
+                digest = hash_sha1.hexdigest()
+        files[file_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest}
+        return digest
+
+    def add_or_update_attachment(self, page_name, filepath, existing_attachments=None):
+        """Uploads the file to the page unless an attachment with the same hash exists.
+
+        ``existing_attachments`` is the page's attachment listing from get_attachments(); without it the
+        attachment is looked up with its own request.
+        """
         print(f"INFO     - Mkdocs With Confluence * {page_name} *ADD/Update ATTACHMENT if required* {filepath}")
-        if self.config["debug"]:
-            print(f" * Mkdocs With Confluence: Add Attachment: PAGE NAME: {page_name}, FILE: {filepath}")
+        log.debug("Mkdocs With Confluence: Add Attachment: PAGE NAME: %s, FILE: %s", page_name, filepath)
         page_id = self.find_page_id(page_name)
         if page_id:
             file_hash = self.get_file_sha1(filepath)
             attachment_message = f"MKDocsWithConfluence [v{file_hash}]"
-            existing_attachment = self.get_attachment(page_id, filepath)
+            if existing_attachments is None:
+                existing_attachment = self.get_attachment(page_id, filepath)
+            else:
+                existing_attachment = existing_attachments.get(os.path.basename(filepath))
             if existing_attachment:
-                file_hash_regex = re.compile(r"\[v([a-f0-9]{40})]$")
-                existing_match = file_hash_regex.search(existing_attachment["version"]["message"])
-                if existing_match is not None and existing_match.group(1) == file_hash:
-                    if self.config["debug"]:
-                        print(f" * Mkdocs With Confluence * {page_name} * Existing attachment skipping * {filepath}")
+                # Attachments uploaded by the plugin end their comment with the fixed-size tag "[v<sha1>]".
+                message = existing_attachment["version"].get("message") or ""
+                existing_hash = message[-41:-1] if message[-43:-41] == "[v" and message.endswith("]") else None
+                if existing_hash == file_hash:
+                    log.debug("Mkdocs With Confluence * %s * Existing attachment skipping * %s", page_name, filepath)
                 else:
                     self.update_attachment(page_id, filepath, existing_attachment, attachment_message)
             else:
                 self.create_attachment(page_id, filepath, attachment_message)
+            if not self.dryrun:
+                self.cache["attachments"].setdefault(page_id, {})[os.path.basename(filepath)] = file_hash
         else:
-            if self.config["debug"]:
-                print("PAGE DOES NOT EXISTS")
+            log.debug("PAGE DOES NOT EXISTS")
 
     # PYLINT_COMMENT: plugin.py:434:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add a docstring, e.g., """Retrieves attachment details from a Confluence page."""
@@ -596,136 +874,157 @@ class MkdocsWithConfluence(BasePlugin):
     # PYLINT_COMMENT: Why: Consistent return behavior makes functions easier to use correctly.
     def get_attachment(self, page_id, filepath):
         name = os.path.basename(filepath)
-        if self.config["debug"]:
-            print(f" * Mkdocs With Confluence: Get Attachment: PAGE ID: {page_id}, FILE: {filepath}")
+        log.debug("Mkdocs With Confluence: Get Attachment: PAGE ID: %s, FILE: %s", page_id, filepath)
 
-        url = self.config["host_url"] + "/rest/api/content/" + page_id + "/child/attachment" # Added /rest/api/content for typical Confluence Cloud API
+        url = f"{self.content_url}/{page_id}/child/attachment"
         headers = {"X-Atlassian-Token": "no-check"}
-        if self.config["debug"]:
-            print(f"URL: {url}")
+        log.debug("URL: %s", url)
 
         r = self.session.get(url, headers=headers, params={"filename": name, "expand": "version"})
         r.raise_for_status()
-        with nostdout(): # Consider if this is necessary or if logging level can control requests' verbosity.
-            response_json = r.json()
+        response_json = r.json()
         if response_json.get("size", 0) > 0 and response_json.get("results"): # Made .get more robust
             return response_json["results"][0]
         return None # Explicit return None
 
+    def get_attachments(self, page_id):
+        """Returns every attachment of the page, keyed by file name, using as few listing requests as possible."""
+        log.debug("Mkdocs With Confluence: Get Attachments: PAGE ID: %s", page_id)
+
+        url = f"{self.content_url}/{page_id}/child/attachment"
+        headers = {"X-Atlassian-Token": "no-check"}
+        attachments = {}
+        start = 0
+        while True:
+            params = {"expand": "version", "limit": ATTACHMENT_LIST_LIMIT, "start": start}
+            r = self.session.get(url, headers=headers, params=params)
+            r.raise_for_status()
+            response_json = r.json()
+            results = response_json.get("results", [])
+            for attachment in results:
+                attachments[attachment["title"]] = attachment
+            if not results or not response_json.get("_links", {}).get("next"):
+                return attachments
+            start += len(results)
+
     # PYLINT_COMMENT: plugin.py:451:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Updates an existing attachment on a Confluence page."""
     # PYLINT_COMMENT: Why: Explains functionality.
     def update_attachment(self, page_id, filepath, existing_attachment, message):
-        if self.config["debug"]:
-            print(f" * Mkdocs With Confluence: Update Attachment: PAGE ID: {page_id}, FILE: {filepath}")
+        log.debug("Mkdocs With Confluence: Update Attachment: PAGE ID: %s, FILE: %s", page_id, filepath)
 
-        url = self.config["host_url"] + "/rest/api/content/" + page_id + "/child/attachment/" + existing_attachment["id"] + "/data"
+        url = f"{self.content_url}/{page_id}/child/attachment/{existing_attachment['id']}/data"
         headers = {"X-Atlassian-Token": "no-check"}
 
-        if self.config["debug"]:
-            print(f"URL: {url}")
+        log.debug("URL: %s", url)
 
-        filename = os.path.basename(filepath)
-
-        # PYLINT_COMMENT: plugin.py:464:22: W0612: Unused variable 'encoding' (unused-variable)
-        # PYLINT_COMMENT: How to fix: Remove `, encoding` if it's not used: `content_type, _ = mimetypes.guess_type(filepath)` or `content_type = mimetypes.guess_type(filepath)[0]`.
-        # PYLINT_COMMENT: Why: Avoids clutter from unused variables.
-        content_type, encoding = mimetypes.guess_type(filepath)
-        if content_type is None:
-            content_type = "application/octet-stream" # More specific than multipart/form-data for a single file
-        # PYLINT_COMMENT: plugin.py:467:36: R1732: Consider using 'with' for resource-allocating operations (consider-using-with)
-        # PYLINT_COMMENT: How to fix: Use `with open(Path(filepath), "rb") as file_to_upload:` and then use `file_to_upload` in the files dict.
-        # PYLINT_COMMENT: Why: Ensures the file is properly closed after the request, even if errors occur.
-        files = {"file": (filename, open(Path(filepath), "rb"), content_type), "comment": (None, message)} # Ensure comment is sent as multipart
-
-        if not self.dryrun:
-            r = self.session.post(url, headers=headers, files=files)
-            r.raise_for_status() # This will raise for non-2xx.
-            # The print(r.json()) and status code check below are somewhat redundant if raise_for_status() is used.
-            # print(r.json()) # This might fail if response is not JSON or empty.
-            if r.status_code == 200: # Should be covered by raise_for_status
-                print("OK!")
-            else:
-                print("ERR!") # Unlikely to be reached if raise_for_status is active.
+        self._post_attachment(url, headers, filepath, message)
 
     # PYLINT_COMMENT: plugin.py:478:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Creates a new attachment on a Confluence page."""
     # PYLINT_COMMENT: Why: Explains functionality.
     def create_attachment(self, page_id, filepath, message):
-        if self.config["debug"]:
-            print(f" * Mkdocs With Confluence: Create Attachment: PAGE ID: {page_id}, FILE: {filepath}")
+        log.debug("Mkdocs With Confluence: Create Attachment: PAGE ID: %s, FILE: %s", page_id, filepath)
 
-        url = self.config["host_url"] + "/rest/api/content/" + page_id + "/child/attachment"
+        url = f"{self.content_url}/{page_id}/child/attachment"
         headers = {"X-Atlassian-Token": "no-check"}
 
-        if self.config["debug"]:
-            print(f"URL: {url}")
+        log.debug("URL: %s", url)
 
-        filename = os.path.basename(filepath)
+        self._post_attachment(url, headers, filepath, message)
 
-        # PYLINT_COMMENT: plugin.py:491:22: W0612: Unused variable 'encoding' (unused-variable)
-        # PYLINT_COMMENT: How to fix: Remove `, encoding` (as above).
-        # PYLINT_COMMENT: Why: Avoids unused variables.
-        content_type, encoding = mimetypes.guess_type(filepath)
+    def _post_attachment(self, url, headers, filepath, message):
+        if self.dryrun:
+            return
+        content_type = mimetypes.guess_type(filepath)[0]
         if content_type is None:
-            content_type = "application/octet-stream"
-        # PYLINT_COMMENT: plugin.py:494:36: R1732: Consider using 'with' for resource-allocating operations (consider-using-with)
-        # PYLINT_COMMENT: How to fix: Use `with open(filepath, "rb") as file_to_upload:`.
-        # PYLINT_COMMENT: Why: Proper file resource management.
-        files = {"file": (filename, open(filepath, "rb"), content_type), "comment": (None, message)}
-        if not self.dryrun:
-            r = self.session.post(url, headers=headers, files=files)
-            # print(r.json()) # Can fail if not JSON.
-            r.raise_for_status()
-            if r.status_code == 200: # Covered by raise_for_status
-                print("OK!")
-            else:
-                print("ERR!") # Unlikely reached.
+            content_type = "application/octet-stream" # More specific than multipart/form-data for a single file
+        with open(filepath, "rb") as file:
+            upload = MultipartUpload(file, os.path.basename(filepath), content_type, message)
+            r = self.session.post(url, headers={**headers, "Content-Type": upload.content_type}, data=upload)
+        r.raise_for_status()
+        if r.status_code == 200: # Covered by raise_for_status
+            log.debug("OK!")
+        else:
+            log.error("Mkdocs With Confluence: attachment upload returned HTTP %s: %s", r.status_code, filepath)
 
     # PYLINT_COMMENT: plugin.py:504:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Finds the Confluence page ID for a given page name and space."""
     # PYLINT_COMMENT: Why: Explains functionality.
     def find_page_id(self, page_name):
-        if self.config["debug"]:
-            print(f"INFO     -    * Mkdocs With Confluence: Find Page ID: PAGE NAME: {page_name}")
-        # Proper URL encoding for parameters is better handled by requests' `params` argument.
-        # name_confl = page_name.replace(" ", "+") # Better: use requests params
-        # url = self.config["host_url"] + "?title=" + name_confl + "&spaceKey=" + self.config["space"] + "&expand=history"
-        url = self.config["host_url"] + "/rest/api/content" # Base endpoint for content
+        key = (self.config["space"], page_name)
+        with self.page_cache_lock:
+            if key in self.page_id_cache:
+                return self.page_id_cache[key]
+        page = self._find_page(page_name)
+        return page["id"] if page else None
+
+    def _find_page(self, page_name):
+        """Looks the page up with its version and ancestors in one request, caches and returns it (None if missing)."""
+        log.debug("Mkdocs With Confluence: Find Page: PAGE NAME: %s", page_name)
+        url = self.content_url
         params = {
             "title": page_name,
             "spaceKey": self.config["space"],
-            "expand": "history"
+            "expand": "version,ancestors",
         }
-        if self.config["debug"]:
-            print(f"URL: {url}, PARAMS: {params}")
+        log.debug("URL: %s, PARAMS: %s", url, params)
         r = self.session.get(url, params=params)
         r.raise_for_status()
-        with nostdout():
-            response_json = r.json()
-        if response_json.get("results"): # More robust check
-            if self.config["debug"]:
-                print(f"ID: {response_json['results'][0]['id']}")
-            return response_json["results"][0]["id"]
-        # PYLINT_COMMENT: plugin.py:515:8: R1705: Unnecessary "else" after "return", remove the "else" and de-indent the code inside it (no-else-return)
-        # PYLINT_COMMENT: How to fix: Unindent the `if self.config["debug"]:` block and the `return None`.
-        # PYLINT_COMMENT: Why: If the `if response_json.get("results"):` is true, it returns. The code below it is effectively the `else` block.
-        else: # This 'else' can be removed and the following code unindented.
-            if self.config["debug"]:
-                print("PAGE DOES NOT EXIST")
+        response_json = r.json()
+        if not response_json.get("results"):
+            log.debug("PAGE DOES NOT EXIST")
             return None
+        page = response_json["results"][0]
+        log.debug("ID: %s", page["id"])
+        # Only found pages are remembered, a missing page may still be created later in the build.
+        self._cache_page(page_name, page)
+        return page
+
+    def find_page_ids(self, page_names):
+        """Looks the pages up with CQL searches of PAGE_LOOKUP_BATCH titles each and caches the result.
+
+        Only hits are cached: the search index can lag behind the content API, so a title missing from the
+        results is confirmed by find_page_id() with a regular lookup. Returns the found ids by title, or an
+        empty dict when the instance rejects the CQL search (find_page_id() then looks the pages up one by one).
+        """
+        page_names = sorted(set(page_names))
+        url = f"{self.content_url}/search"
+        space = cql_string(self.config["space"])
+        found = {}
+        for start in range(0, len(page_names), PAGE_LOOKUP_BATCH):
+            batch = page_names[start : start + PAGE_LOOKUP_BATCH]
+            titles = ",".join(cql_string(name) for name in batch)
+            params = {
+                "cql": f"space={space} and type=page and title in ({titles})",
+                "expand": "version,ancestors",
+                "limit": len(batch),
+            }
+            log.debug("URL: %s, PARAMS: %s", url, params)
+            r = self.session.get(url, params=params)
+            if r.status_code == 400:
+                log.debug("CQL SEARCH NOT SUPPORTED, PAGES ARE LOOKED UP ONE BY ONE")
+                return {}
+            r.raise_for_status()
+            # CQL may match titles regardless of case; only the exact title is the page we are looking for.
+            results = {result["title"]: result for result in r.json().get("results", [])}
+            for name in batch:
+                result = results.get(name)
+                if result is not None:
+                    self._cache_page(name, result)
+                    found[name] = result["id"]
+        return found
 
     # PYLINT_COMMENT: plugin.py:524:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Adds a new page to Confluence under a specific parent page."""
     # PYLINT_COMMENT: Why: Explains functionality.
     def add_page(self, page_name, parent_page_id, page_content_in_storage_format):
+        """Creates the page and returns its id (None in dryrun mode)."""
         print(f"INFO     -    * Mkdocs With Confluence: {page_name} - *NEW PAGE*")
 
-        if self.config["debug"]:
-            print(f" * Mkdocs With Confluence: Adding Page: PAGE NAME: {page_name}, parent ID: {parent_page_id}")
-        url = self.config["host_url"] + "/rest/api/content/"
-        if self.config["debug"]:
-            print(f"URL: {url}")
+        log.debug("Mkdocs With Confluence: Adding Page: PAGE NAME: %s, parent ID: %s", page_name, parent_page_id)
+        url = self.content_url + "/"
+        log.debug("URL: %s", url)
         headers = {"Content-Type": "application/json"}
         space = self.config["space"]
         data = {
@@ -738,17 +1037,28 @@ class MkdocsWithConfluence(BasePlugin):
         if parent_page_id is None: # If no parent, cannot set ancestors. Check API for creating top-level page in space.
             del data["ancestors"] # Or handle differently based on API requirements
 
-        if self.config["debug"]:
-            print(f"DATA: {data}")
+        log.debug("DATA: %s", data)
         if not self.dryrun:
-            r = self.session.post(url, json=data, headers=headers)
+            r = self.session.post(url, data=dump_json(data), headers=headers)
             r.raise_for_status()
             if r.status_code == 200: # Covered by raise_for_status
-                if self.config["debug"]:
-                    print("OK!")
+                log.debug("OK!")
             else: # Unlikely reached
-                if self.config["debug"]:
-                    print("ERR!")
+                log.debug("ERR!")
+            response_json = r.json()
+            self._cache_page(page_name, response_json)
+            return response_json["id"]
+        return None
+
+    def _cache_page(self, page_name, page):
+        """Remembers the id, and the version and parent title when expanded, of a page returned by Confluence."""
+        key = (self.config["space"], page_name)
+        with self.page_cache_lock:
+            self.page_id_cache[key] = page["id"]
+            if "version" in page:
+                self.page_version_cache[key] = (page["version"]["number"], time.monotonic() + PAGE_VERSION_TTL)
+            if "ancestors" in page:
+                self.page_parent_cache[key] = page["ancestors"][-1]["title"] if page["ancestors"] else None
 
     # PYLINT_COMMENT: plugin.py:553:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Updates an existing page in Confluence."""
@@ -756,17 +1066,15 @@ class MkdocsWithConfluence(BasePlugin):
     def update_page(self, page_name, page_content_in_storage_format):
         page_id = self.find_page_id(page_name)
         print(f"INFO     -    * Mkdocs With Confluence: {page_name} - *UPDATE*")
-        if self.config["debug"]:
-            print(f" * Mkdocs With Confluence: Update PAGE ID: {page_id}, PAGE NAME: {page_name}")
+        log.debug("Mkdocs With Confluence: Update PAGE ID: %s, PAGE NAME: %s", page_id, page_name)
         if page_id:
             page_version = self.find_page_version(page_name)
             if page_version is None: # Should not happen if page_id was found, but good to be safe
-                if self.config["debug"]: print(f"ERR! Could not find version for page {page_name} (ID: {page_id})")
+                log.debug("ERR! Could not find version for page %s (ID: %s)", page_name, page_id)
                 return
             page_version = page_version + 1
-            url = self.config["host_url"] + "/rest/api/content/" + page_id
-            if self.config["debug"]:
-                print(f"URL: {url}")
+            url = f"{self.content_url}/{page_id}"
+            log.debug("URL: %s", url)
             headers = {"Content-Type": "application/json"}
             space = self.config["space"] # Not usually needed for PUT by ID, but doesn't hurt if API ignores.
             data = {
@@ -779,88 +1087,45 @@ class MkdocsWithConfluence(BasePlugin):
             }
 
             if not self.dryrun:
-                r = self.session.put(url, json=data, headers=headers)
+                r = self.session.put(url, data=dump_json(data), headers=headers)
                 r.raise_for_status()
+                self._cache_page(page_name, {"id": page_id, "version": {"number": page_version}})
                 if r.status_code == 200: # Covered by raise_for_status
-                    if self.config["debug"]:
-                        print("OK!")
+                    log.debug("OK!")
                 else: # Unlikely reached
-                    if self.config["debug"]:
-                        print("ERR!")
+                    log.debug("ERR!")
         else:
-            if self.config["debug"]:
-                print("PAGE DOES NOT EXIST YET!")
+            log.debug("PAGE DOES NOT EXIST YET!")
 
     # PYLINT_COMMENT: plugin.py:588:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Finds the current version number of a Confluence page."""
     # PYLINT_COMMENT: Why: Explains functionality.
     def find_page_version(self, page_name):
-        if self.config["debug"]:
-            print(f"INFO     -    * Mkdocs With Confluence: Find PAGE VERSION, PAGE NAME: {page_name}")
-        # name_confl = page_name.replace(" ", "+")
-        # url = self.config["host_url"] + "?title=" + name_confl + "&spaceKey=" + self.config["space"] + "&expand=version"
-        url = self.config["host_url"] + "/rest/api/content"
-        params = {
-            "title": page_name,
-            "spaceKey": self.config["space"],
-            "expand": "version"
-        }
-        r = self.session.get(url, params=params)
-        r.raise_for_status()
-        with nostdout():
-            response_json = r.json()
-        # PYLINT_COMMENT: The check `if response_json["results"] is not None:` is okay, but `if response_json.get("results"):` is safer.
-        if response_json.get("results"): # Check if results list is not empty
-            if self.config["debug"]:
-                print(f"VERSION: {response_json['results'][0]['version']['number']}")
-            return response_json["results"][0]["version"]["number"]
-        # PYLINT_COMMENT: plugin.py:597:8: R1705: Unnecessary "else" after "return", remove the "else" and de-indent the code inside it (no-else-return)
-        # PYLINT_COMMENT: How to fix: Unindent the `if self.config["debug"]:` block and `return None`.
-        # PYLINT_COMMENT: Why: If the `if` condition is true, it returns; otherwise, the subsequent code is executed (effectively the else).
-        else:
-            if self.config["debug"]:
-                print("PAGE DOES NOT EXISTS")
+        key = (self.config["space"], page_name)
+        with self.page_cache_lock:
+            version, expires = self.page_version_cache.get(key, (None, 0))
+        if version is not None and time.monotonic() < expires:
+            return version
+        page = self._find_page(page_name)
+        if page is None:
             return None
+        log.debug("VERSION: %s", page["version"]["number"])
+        return page["version"]["number"]
 
     # PYLINT_COMMENT: plugin.py:606:4: C0116: Missing function or method docstring (missing-function-docstring)
     # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Finds the title of the immediate parent of a Confluence page."""
     # PYLINT_COMMENT: Why: Explains functionality.
     def find_parent_name_of_page(self, name):
-        if self.config["debug"]:
-            print(f"INFO     -    * Mkdocs With Confluence: Find PARENT OF PAGE, PAGE NAME: {name}")
-        idp = self.find_page_id(name)
-        if not idp: # If page itself doesn't exist, it has no parent.
-            if self.config["debug"]: print(f"Page '{name}' not found, so cannot find its parent.")
+        log.debug("Mkdocs With Confluence: Find PARENT OF PAGE, PAGE NAME: %s", name)
+        key = (self.config["space"], name)
+        with self.page_cache_lock:
+            if key in self.page_parent_cache:
+                return self.page_parent_cache[key]
+        # The parent comes with the page lookup (expand=ancestors), no request by id is needed.
+        if self._find_page(name) is None: # If page itself doesn't exist, it has no parent.
+            log.debug("Page '%s' not found, so cannot find its parent.", name)
             return None
-        url = self.config["host_url"] + "/rest/api/content/" + idp + "?expand=ancestors"
-
-        r = self.session.get(url)
-        r.raise_for_status()
-        with nostdout():
-            response_json = r.json()
-        if response_json and response_json.get("ancestors"): # Check if ancestors list exists and is not empty
-            if self.config["debug"]:
-                print(f"PARENT NAME: {response_json['ancestors'][-1]['title']}")
-            return response_json["ancestors"][-1]["title"]
-        # PYLINT_COMMENT: plugin.py:616:8: R1705: Unnecessary "else" after "return", remove the "else" and de-indent the code inside it (no-else-return)
-        # PYLINT_COMMENT: How to fix: Unindent the `if self.config["debug"]:` block and `return None`.
-        # PYLINT_COMMENT: Why: Same reasoning as above.
-        else:
-            if self.config["debug"]:
-                print("PAGE DOES NOT HAVE PARENT or ancestors list is empty")
-            return None
-
-    # PYLINT_COMMENT: plugin.py:625:4: C0116: Missing function or method docstring (missing-function-docstring)
-    # PYLINT_COMMENT: How to fix: Add docstring, e.g., """Waits for a condition to become truthy or a timeout occurs."""
-    # PYLINT_COMMENT: Note: The 'condition' parameter as used in on_page_markdown is a value, not a callable. This method currently waits if the initial value of 'condition' is falsey. It does not re-evaluate anything.
-    # PYLINT_COMMENT: How to fix (usage): If the intent is to wait for `find_page_id` to return a value, the loop should be `while self.find_page_id(page_name) is None and time.time() - start < timeout:`.
-    # PYLINT_COMMENT: Why: The current implementation of `wait_until` might not work as intended for waiting for an external state to change.
-    def wait_until(self, condition, interval=0.1, timeout=1):
-        start = time.time()
-        # If condition is a value (e.g. an ID or None):
-        # If initially None (falsey), it will sleep. If initially an ID (truthy), it won't sleep.
-        # It does not re-check or poll for the condition to change here. That happens outside this method.
-        while not condition and time.time() - start < timeout:
-            time.sleep(interval)
-        # To make it a true polling wait:
-        # `condition` should be a callable: `while not condition_callable() and time.time() - start < timeout:`
+        with self.page_cache_lock:
+            parent_name = self.page_parent_cache.get(key)
+        log.debug("PARENT NAME: %s", parent_name)
+        return parent_name
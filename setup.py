@@ -10,7 +10,7 @@ setup(
     author_email="sikor6@gmail.com",
     license="MIT",
     python_requires=">=3.6",
-    install_requires=["mkdocs>=1.1", "jinja2", "mistune", "md2cf", "requests"],
+    install_requires=["mkdocs>=1.1", "jinja2", "mistune>=0.8.4,<2", "md2cf", "requests", "urllib3>=1.26"],
     packages=find_packages(),
     entry_points={"mkdocs.plugins": ["mkdocs-with-confluence = mkdocs_with_confluence.plugin:MkdocsWithConfluence"]},
 )
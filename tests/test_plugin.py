@@ -0,0 +1,537 @@
+import email
+import hashlib
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from requests.adapters import HTTPAdapter
+
+from mkdocs_with_confluence.plugin import (
+    ATTACHMENT_WORKERS,
+    RETRY_POLICY,
+    ConfluenceSession,
+    MkdocsWithConfluence,
+    MultipartUpload,
+    RateLimiter,
+)
+
+
+def response(status_code=200, headers=None, json_data=None):
+    return SimpleNamespace(
+        status_code=status_code,
+        headers=headers or {},
+        json=lambda: json_data,
+        raise_for_status=lambda: None,
+    )
+
+
+class FakeSession:
+    """Answers GETs from a list of canned responses and records their params."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, params=None):
+        self.calls.append((url, params))
+        return self.responses.pop(0)
+
+
+class ScriptedHandler(http.server.BaseHTTPRequestHandler):
+    """Answers with the (status, headers) replies queued on the server, then with 200, and records every request."""
+
+    def do_GET(self):
+        self.reply()
+
+    def do_POST(self):
+        self.reply()
+
+    def reply(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.command, body))
+        status, headers = self.server.replies.pop(0) if self.server.replies else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+    server.replies = []
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_port}/rest/api/content"
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    """A session of its own, so the limiter state of a test doesn't leak into the shared plugin session."""
+    session = ConfluenceSession(RateLimiter(4, low_quota_pause=0.05))
+    session.mount("http://", HTTPAdapter(max_retries=RETRY_POLICY))
+    yield session
+    session.close()
+
+
+class FakeConfluence:
+    """In-memory Confluence space answering the content endpoints used to sync pages, recording every call."""
+
+    def __init__(self, url, *titles):
+        self.url = url
+        self.pages = {}
+        self.calls = []
+        for title in titles:
+            self.create(title, None)
+
+    def create(self, title, parent):
+        page = {"id": str(len(self.pages) + 1), "title": title, "version": {"number": 1}, "ancestors": []}
+        if parent:
+            page["ancestors"].append({"title": parent})
+        self.pages[title] = page
+        return page
+
+    def get(self, url, params=None, headers=None):
+        self.calls.append(("GET", url))
+        if url == f"{self.url}/search":
+            results = [page for title, page in self.pages.items() if json.dumps(title) in params["cql"]]
+        elif url == self.url:
+            results = [self.pages[params["title"]]] if params["title"] in self.pages else []
+        else:
+            results = []
+        return response(json_data={"results": results})
+
+    def post(self, url, data=None, headers=None):
+        self.calls.append(("POST", url))
+        data = json.loads(data)
+        parent_id = data["ancestors"][0]["id"]
+        parent = next(page["title"] for page in self.pages.values() if page["id"] == parent_id)
+        return response(json_data=self.create(data["title"], parent))
+
+    def put(self, url, data=None, headers=None):
+        self.calls.append(("PUT", url))
+        data = json.loads(data)
+        self.pages[data["title"]]["version"] = data["version"]
+        return response(json_data={})
+
+
+@pytest.fixture
+def plugin():
+    plugin = MkdocsWithConfluence()
+    plugin.config = {"space": "DOCS"}
+    plugin.content_url = "https://confluence.example.com/rest/api/content"
+    plugin.dryrun = False
+    return plugin
+
+
+@pytest.fixture
+def configure(tmp_path):
+    """Builds a plugin and runs its on_config with the given options on top of a valid configuration."""
+
+    def configure(**options):
+        plugin = MkdocsWithConfluence()
+        options = {"host_url": "https://confluence.example.com", "space": "DOCS", "username": "user", **options}
+        errors, _ = plugin.load_config(options)
+        assert not errors
+        plugin.on_config({"config_file_path": str(tmp_path / "mkdocs.yml")})
+        return plugin
+
+    return configure
+
+
+# Config
+
+
+def test_missing_config_turns_exporting_off(configure, caplog):
+    plugin = configure(space="", username="", dryrun=True)
+    assert not plugin.enabled
+    assert plugin.dryrun
+    assert "missing config value(s) space, username" in caplog.text
+
+
+def test_exporting_is_on_by_default(configure):
+    plugin = configure()
+    assert plugin.enabled
+    assert not plugin.dryrun
+
+
+@pytest.mark.parametrize("value, enabled", [(None, False), ("0", False), ("1", True)])
+def test_exporting_follows_enabled_if_env(configure, monkeypatch, value, enabled):
+    monkeypatch.delenv("PUBLISH_TO_CONFLUENCE", raising=False)
+    if value is not None:
+        monkeypatch.setenv("PUBLISH_TO_CONFLUENCE", value)
+    assert configure(enabled_if_env="PUBLISH_TO_CONFLUENCE").enabled is enabled
+
+
+# Nav
+
+
+def nav_page(title, src_path="page.md"):
+    return SimpleNamespace(is_section=False, is_page=True, title=title, file=SimpleNamespace(src_path=src_path))
+
+
+def nav_section(title, *children):
+    return SimpleNamespace(is_section=True, is_page=False, title=title, children=list(children))
+
+
+def test_nav_is_listed_in_order_with_its_depth(plugin):
+    nav = SimpleNamespace(
+        items=[
+            nav_page("Home"),
+            nav_section("Guide", nav_page("Install"), nav_section("Advanced", nav_page(None, "guide/tuning.md"))),
+            nav_section("Reference", nav_page("Install")),
+        ]
+    )
+    plugin.on_nav(nav, {}, None)
+    assert MkdocsWithConfluence.tab_nav == [
+        "Home",
+        "Guide",
+        "    Install",
+        "    Advanced",
+        "        tuning",
+        "Reference",
+        "    Install",
+    ]
+    # A title listed twice keeps the line of its first occurrence.
+    assert MkdocsWithConfluence.tab_by_title["Install"] == "    Install"
+    assert MkdocsWithConfluence.tab_by_title["tuning"] == "        tuning"
+
+
+# RateLimiter
+
+
+def test_rate_limiter_halves_concurrency_on_throttling_and_errors():
+    limiter = RateLimiter(8, low_quota_pause=0.01)
+    for status_code in (429, 503):
+        limiter.acquire()
+        limiter.release(response(status_code))
+    limiter.acquire()
+    limiter.release(None)
+    assert limiter.concurrency == 1.0
+    limiter.acquire()
+    limiter.release(response(500))
+    assert limiter.concurrency == 1.0
+    assert limiter.in_flight == 0
+
+
+def test_rate_limiter_grows_concurrency_on_success_up_to_the_maximum():
+    limiter = RateLimiter(4)
+    limiter.concurrency = 1.0
+    for expected in (1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.0):
+        limiter.acquire()
+        limiter.release(response(200))
+        assert limiter.concurrency == expected
+
+
+def test_rate_limiter_pauses_for_retry_after():
+    limiter = RateLimiter(4)
+    limiter.acquire()
+    before = time.monotonic()
+    limiter.release(response(429, {"Retry-After": "0.2"}))
+    assert limiter.pause_until >= before + 0.2
+    limiter.acquire()
+    assert time.monotonic() >= before + 0.2
+    limiter.release(response(200))
+
+
+def test_rate_limiter_pauses_when_quota_runs_low():
+    limiter = RateLimiter(4, low_quota_pause=5.0)
+    limiter.acquire()
+    limiter.release(response(200, {"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "50"}))
+    assert limiter.rate_limit == 100
+    assert limiter.pause_until == 0.0
+    limiter.acquire()
+    limiter.release(response(200, {"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "9"}))
+    assert limiter.pause_until > time.monotonic() + 4
+
+
+def test_rate_limiter_only_counts_requests_against_an_advertised_quota():
+    limiter = RateLimiter(4)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(response(200))
+    assert not limiter.window
+    limiter.acquire()
+    limiter.release(response(200, {"X-RateLimit-Limit": "100"}))
+    limiter.acquire()
+    limiter.release(response(200))
+    assert len(limiter.window) == 1
+
+
+# ConfluenceSession
+
+
+def test_throttled_requests_go_through_the_rate_limiter(server, session):
+    server.replies = [(429, {"Retry-After": "0.1"}), (429, {"Retry-After": "0.1"})]
+    start = time.monotonic()
+    assert session.get(server.url).status_code == 200
+    assert time.monotonic() - start >= 0.2
+    assert len(server.requests) == 3
+    # Halved by each 429, then +0.5 for the final 200.
+    assert session.rate_limiter.concurrency == 1.5
+
+
+def test_throttled_requests_without_retry_after_back_off(server, session):
+    server.replies = [(503, {}), (503, {}), (503, {})]
+    start = time.monotonic()
+    assert session.post(server.url, data=b"{}").status_code == 200
+    assert time.monotonic() - start >= 0.05 + 0.1 + 0.2
+    assert len(server.requests) == 4
+    assert session.rate_limiter.backoff == 0.0
+
+
+def test_post_is_not_sent_again_after_a_server_error(server, session):
+    server.replies = [(502, {})]
+    assert session.post(server.url, data=b"{}").status_code == 502
+    assert len(server.requests) == 1
+
+
+def test_get_is_retried_after_a_server_error(server, session):
+    server.replies = [(502, {})]
+    assert session.get(server.url).status_code == 200
+    assert len(server.requests) == 2
+
+
+def test_connection_pool_and_limiter_are_sized_from_threads(configure):
+    session = configure(threads=3).session
+    assert session.rate_limiter.max_concurrency == 3 + ATTACHMENT_WORKERS
+    assert session.get_adapter("https://confluence.example.com")._pool_maxsize == 3 + ATTACHMENT_WORKERS
+    assert configure(threads=3).session is session
+    resized = configure(threads=20).session
+    assert resized is not session
+    assert resized.rate_limiter.max_concurrency == 20 + ATTACHMENT_WORKERS
+
+
+def test_threads_is_at_least_one(configure):
+    plugin = configure(threads=0)
+    assert plugin.config["threads"] == 1
+    assert plugin.session.rate_limiter.max_concurrency == 1 + ATTACHMENT_WORKERS
+
+
+# MultipartUpload
+
+
+@pytest.fixture
+def attachment(tmp_path):
+    path = tmp_path / "image.png"
+    path.write_bytes(os.urandom(100000))
+    return path
+
+
+def parse_multipart(content_type, body):
+    message = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    return {part.get_param("name", header="Content-Disposition"): part for part in message.get_payload()}
+
+
+def test_multipart_upload_streams_file_between_head_and_tail(attachment):
+    with open(attachment, "rb") as file:
+        upload = MultipartUpload(file, 'my "image".png', "image/png", "comment")
+        chunks = []
+        while True:
+            chunk = upload.read(8192)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    body = b"".join(chunks)
+    assert len(upload) == len(body) == upload.tell()
+    parts = parse_multipart(upload.content_type, body)
+    assert parts["file"].get_filename() == "my %22image%22.png"
+    assert parts["file"].get_content_type() == "image/png"
+    assert parts["file"].get_payload(decode=True) == attachment.read_bytes()
+    assert parts["comment"].get_payload() == "comment"
+
+
+def test_multipart_upload_rewinds(attachment):
+    with open(attachment, "rb") as file:
+        upload = MultipartUpload(file, "image.png", "image/png", "comment")
+        body = upload.read()
+        assert upload.read() == b""
+        assert upload.seek(0) == 0
+        assert upload.read(50) + upload.read() == body
+        assert upload.seek(-10, os.SEEK_END) == len(upload) - 10
+        assert upload.read() == body[-10:]
+
+
+def test_attachment_upload_is_resent_whole_after_503(plugin, server, session, attachment):
+    server.replies = [(503, {})]
+    plugin.session = session
+    url = f"{server.url}/1/child/attachment"
+    plugin._post_attachment(url, {"X-Atlassian-Token": "no-check"}, str(attachment), "comment")
+    (_, first), (_, second) = server.requests
+    assert first == second
+    assert attachment.read_bytes() in second
+
+
+# Page sync
+
+
+def build(plugin, site_dir, *pages):
+    for markdown, page in pages:
+        plugin.on_page_markdown(markdown, page, {}, None)
+    plugin.on_post_build({"site_dir": str(site_dir)})
+
+
+def test_pages_and_missing_parents_are_created_once(configure, tmp_path):
+    plugin = configure(parent_page_name="Root")
+    plugin.session = confluence = FakeConfluence(plugin.content_url, "Root")
+    pages = [(f"Page {name}", markdown_page(f"{name}.md", name, "Section")) for name in "ABCD"]
+    build(plugin, tmp_path, *pages)
+    assert [method for method, _ in confluence.calls].count("POST") == 5
+    assert confluence.pages["Section"]["ancestors"] == [{"title": "Root"}]
+    for name in "ABCD":
+        assert confluence.pages[name]["ancestors"] == [{"title": "Section"}]
+    assert not plugin.page_queue
+
+
+def test_only_changed_pages_are_sent_by_the_next_build(configure, tmp_path):
+    plugin = configure(parent_page_name="Root")
+    plugin.session = confluence = FakeConfluence(plugin.content_url, "Root")
+    a, b = markdown_page("a.md", "A", "Root"), markdown_page("b.md", "B", "Root")
+    build(plugin, tmp_path, ("Page A", a), ("Page B", b))
+    confluence.calls = []
+    plugin = configure(parent_page_name="Root")
+    plugin.session = confluence
+    build(plugin, tmp_path, ("Page A", a), ("Changed", b))
+    assert [call for call in confluence.calls if call[0] != "GET"] == [("PUT", f"{plugin.content_url}/3")]
+    assert confluence.pages["B"]["version"] == {"number": 2}
+
+
+# Page cache
+
+
+def markdown_page(src_path, title, *ancestors):
+    file = SimpleNamespace(src_path=src_path, abs_src_path=f"/docs/{src_path}")
+    return SimpleNamespace(title=title, file=file, ancestors=[SimpleNamespace(title=a) for a in ancestors])
+
+
+def queued_page(plugin, title, parent, uploaded):
+    plugin.page_queue.append(
+        {
+            "path": f"{title}.md",
+            "title": title,
+            "body": "<p>body</p>",
+            "parent": parent,
+            "parent1": None,
+            "main_parent": None,
+            "attachments": [],
+            "cache": {"hash": "", "body": "<p>body</p>", "uploaded": uploaded},
+        }
+    )
+    return plugin.page_queue[-1]
+
+
+def test_unchanged_markdown_is_not_rendered_again(configure):
+    plugin = configure()
+    markdown = "# Title\n\nText"
+    cached = {"hash": hashlib.sha256(markdown.encode()).hexdigest(), "body": "<p>cached</p>", "uploaded": True}
+    plugin.cache["pages"]["a.md"] = cached
+    plugin.on_page_markdown(markdown, markdown_page("a.md", "A", "Section"), {}, None)
+    plugin.on_page_markdown("Other", markdown_page("b.md", "B", "Section"), {}, None)
+    a, b = plugin.page_queue
+    assert a["body"] == "<p>cached</p>" and a["cache"] is cached
+    assert "Other" in b["body"] and not b["cache"]["uploaded"]
+    assert plugin.cache["pages"]["b.md"] is b["cache"]
+
+
+def test_unchanged_page_is_not_uploaded_again(plugin):
+    plugin._cache_page("A", {"id": "1", "ancestors": [{"title": "Section"}]})
+    plugin.session = FakeSession()
+    assert plugin._upload_page(queued_page(plugin, "A", "Section", uploaded=True))
+    assert not plugin.session.calls
+
+
+def test_changed_page_is_updated(plugin, monkeypatch):
+    updates = []
+    monkeypatch.setattr(plugin, "update_page", lambda title, body: updates.append(title))
+    plugin._cache_page("A", {"id": "1", "ancestors": [{"title": "Section"}]})
+    page = queued_page(plugin, "A", "Section", uploaded=False)
+    assert plugin._upload_page(page)
+    assert updates == ["A"]
+    assert page["cache"]["uploaded"]
+
+
+def test_unchanged_page_moved_in_the_nav_is_reported(plugin, caplog):
+    plugin._cache_page("A", {"id": "1", "ancestors": [{"title": "Old section"}]})
+    with caplog.at_level(logging.WARNING):
+        assert not plugin._upload_page(queued_page(plugin, "A", "New section", uploaded=True))
+    assert "'Old section' on Confluence but 'New section' here" in caplog.text
+
+
+def test_cache_drops_entries_not_seen_in_the_build(plugin):
+    plugin.cache = {
+        "pages": {"A.md": {}, "removed.md": {}},
+        "files": {"/docs/a.png": {}, "/docs/removed.png": {}},
+        "attachments": {"1": {"a.png": ""}, "2": {"removed.png": ""}},
+    }
+    plugin._cache_page("A", {"id": "1"})
+    plugin.hashed_files = {"/docs/a.png"}
+    plugin._prune_cache([queued_page(plugin, "A", None, uploaded=True)])
+    assert plugin.cache == {"pages": {"A.md": {}}, "files": {"/docs/a.png": {}}, "attachments": {"1": {"a.png": ""}}}
+
+
+# find_page_ids
+
+
+def test_find_page_ids_escapes_titles_and_space_in_cql(plugin):
+    plugin.config["space"] = 'D"S\\'
+    plugin.session = FakeSession(response(json_data={"results": []}))
+    plugin.find_page_ids(['Say "hi"', "C:\\path"])
+    _, params = plugin.session.calls[0]
+    assert params["cql"] == 'space="D\\"S\\\\" and type=page and title in ("C:\\\\path","Say \\"hi\\"")'
+    assert params["limit"] == 2
+
+
+def test_find_page_ids_caches_hits(plugin):
+    page = {"id": "42", "title": "Home", "version": {"number": 3}, "ancestors": [{"title": "Root"}]}
+    plugin.session = FakeSession(response(json_data={"results": [page]}))
+    assert plugin.find_page_ids(["Home"]) == {"Home": "42"}
+    assert plugin.find_page_id("Home") == "42"
+    assert plugin.find_page_version("Home") == 3
+    assert plugin.find_parent_name_of_page("Home") == "Root"
+    assert len(plugin.session.calls) == 1
+
+
+def test_find_page_ids_ignores_titles_differing_in_case(plugin):
+    page = {"id": "42", "title": "Home", "version": {"number": 3}, "ancestors": []}
+    plugin.session = FakeSession(response(json_data={"results": [page]}), response(json_data={"results": []}))
+    assert plugin.find_page_ids(["HOME"]) == {}
+    assert plugin.find_page_id("HOME") is None
+    assert len(plugin.session.calls) == 2
+
+
+def test_find_page_ids_does_not_cache_misses(plugin):
+    page = {"id": "7", "title": "New", "version": {"number": 1}, "ancestors": []}
+    plugin.session = FakeSession(response(json_data={"results": []}), response(json_data={"results": [page]}))
+    assert plugin.find_page_ids(["New"]) == {}
+    assert plugin.find_page_id("New") == "7"
+    url, params = plugin.session.calls[1]
+    assert url == plugin.content_url
+    assert params["title"] == "New"
+
+
+def test_find_page_ids_searches_in_batches(plugin):
+    titles = [f"Page {i:02}" for i in range(30)]
+    plugin.session = FakeSession(response(json_data={"results": []}), response(json_data={"results": []}))
+    plugin.find_page_ids(titles)
+    assert [params["limit"] for _, params in plugin.session.calls] == [25, 5]
+
+
+def test_find_page_ids_falls_back_when_cql_is_rejected(plugin):
+    plugin.session = FakeSession(response(400))
+    assert plugin.find_page_ids(["Home", "Other"]) == {}
+    assert len(plugin.session.calls) == 1
+    assert not plugin.page_id_cache